@@ -0,0 +1,326 @@
+"""
+Drive the running application with a concurrent HTTP load of realistic roles.
+
+    python -m benchmarks.load --base-url http://127.0.0.1:8000 --users 50 \
+        --duration 60 --output results.json --compare baseline.json
+
+Cashiers place and close orders, chefs poll pending orders and move them
+through the kitchen, admins run reports. Latencies are reported per endpoint.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+import httpx
+from benchmarks.stats import (
+    compare_summaries,
+    load_results,
+    print_comparison,
+    save_results,
+    summarize,
+)
+
+REPORTS = (
+    "customers-orders",
+    "chefs-orders",
+    "issuers-orders",
+    "orders-income",
+    "new-customers",
+    "top-selling-items",
+)
+
+
+class Recorder:
+    """
+    Collects the latency and status of every request by endpoint
+    """
+
+    def __init__(self):
+        self.durations: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(
+        self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs
+    ) -> httpx.Response:
+        started_at = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.statuses[name][0] += 1
+            raise
+        self.durations[name].append(time.perf_counter() - started_at)
+        self.statuses[name][response.status_code] += 1
+        return response
+
+
+class VirtualUser:
+    """
+    A staff member of a seeded shop running its role scenario in a loop
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        recorder: Recorder,
+        shop: dict,
+        member: dict,
+        password: str,
+        think_time: float,
+        rng: random.Random,
+    ):
+        self.client = client
+        self.recorder = recorder
+        self.shop = shop
+        self.member = member
+        self.password = password
+        self.think_time = think_time
+        self.rng = rng
+        self.headers = {}
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        return await self.recorder.request(
+            self.client, name, method, url, headers=self.headers, **kwargs
+        )
+
+    async def login(self) -> None:
+        response = await self.recorder.request(
+            self.client,
+            "POST /login",
+            "POST",
+            "/login",
+            json={"username": self.member["email"], "password": self.password},
+        )
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def think(self) -> None:
+        if self.think_time:
+            await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+
+    async def step(self) -> None:
+        raise NotImplementedError
+
+    async def run(self, deadline: float) -> None:
+        await self.login()
+        while time.perf_counter() < deadline:
+            try:
+                await self.step()
+            except httpx.HTTPError:
+                pass
+            await self.think()
+
+
+class Cashier(VirtualUser):
+    async def step(self) -> None:
+        if self.rng.random() < 0.8:
+            items = self.rng.sample(
+                self.shop["menu_item_ids"],
+                min(self.rng.randint(1, 4), len(self.shop["menu_item_ids"])),
+            )
+            if self.shop["customer_phones"] and self.rng.random() < 0.7:
+                phone_no = self.rng.choice(self.shop["customer_phones"])
+            else:
+                phone_no = f"+1666{self.rng.randrange(10**8):08d}"
+            await self.request(
+                "POST /orders",
+                "POST",
+                "/orders",
+                json={
+                    "customer_details": {"name": "Walk-in", "phone_no": phone_no},
+                    "order_items": [
+                        {"id": item, "quantity": self.rng.randint(1, 3)}
+                        for item in items
+                    ],
+                },
+            )
+            return
+
+        response = await self.request(
+            "GET /orders/?order_status=COMPLETED",
+            "GET",
+            "/orders/",
+            params={"order_status": "COMPLETED", "size": 10},
+        )
+        orders = response.json().get("orders", []) if response.is_success else []
+        if orders:
+            await self.request(
+                "PATCH /orders/{order_id}/status",
+                "PATCH",
+                f"/orders/{self.rng.choice(orders)['id']}/status",
+                json={"status": "CLOSED"},
+            )
+
+
+class Chef(VirtualUser):
+    async def step(self) -> None:
+        response = await self.request(
+            "GET /orders/?order_status=PENDING,IN_PROGRESS",
+            "GET",
+            "/orders/",
+            params={"order_status": ["PENDING", "IN_PROGRESS"], "size": 10},
+        )
+        orders = response.json().get("orders", []) if response.is_success else []
+        if not orders:
+            return
+        picked_order = self.rng.choice(orders)
+        if picked_order["status"] == "PENDING":
+            await self.request(
+                "PATCH /orders/{order_id}/assign/{user_id}",
+                "PATCH",
+                f"/orders/{picked_order['id']}/assign/{self.member['id']}",
+            )
+            new_status = "IN_PROGRESS"
+        else:
+            new_status = "COMPLETED"
+        await self.request(
+            "PATCH /orders/{order_id}/status",
+            "PATCH",
+            f"/orders/{picked_order['id']}/status",
+            json={"status": new_status},
+        )
+
+
+class Admin(VirtualUser):
+    async def step(self) -> None:
+        report = self.rng.choice(REPORTS)
+        to_date = date.today()
+        from_date = to_date - timedelta(days=self.rng.choice((1, 7, 30)))
+        params = {}
+        if report != "customers-orders":
+            params = {
+                "from_date": from_date.isoformat(),
+                "to_date": to_date.isoformat(),
+            }
+        await self.request(
+            f"GET /reports/coffee-shops/{{coffee_shop_id}}/{report}",
+            "GET",
+            f"/reports/coffee-shops/{self.shop['id']}/{report}",
+            params=params,
+        )
+
+
+ROLES = {
+    "cashier": (Cashier, "cashiers"),
+    "chef": (Chef, "chefs"),
+    "admin": (Admin, "admins"),
+}
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    """
+    Parse a role mix like "cashier=6,chef=3,admin=1" into weights
+    """
+    weights = {}
+    for part in mix.split(","):
+        role, _, weight = part.partition("=")
+        if role.strip() not in ROLES:
+            raise argparse.ArgumentTypeError(f"unknown role {role!r}")
+        weights[role.strip()] = int(weight)
+    return weights
+
+
+async def run_load(args: argparse.Namespace) -> dict:
+    manifest = load_results(args.manifest)
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    roles, weights = zip(*parse_mix(args.mix).items())
+    limits = httpx.Limits(
+        max_connections=args.users, max_keepalive_connections=args.users
+    )
+
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        virtual_users = []
+        for index in range(args.users):
+            role = rng.choices(roles, weights)[0]
+            user_class, manifest_key = ROLES[role]
+            shop = manifest["shops"][index % len(manifest["shops"])]
+            virtual_users.append(
+                user_class(
+                    client=client,
+                    recorder=recorder,
+                    shop=shop,
+                    member=rng.choice(shop[manifest_key]),
+                    password=manifest["password"],
+                    think_time=args.think_time,
+                    rng=random.Random(rng.random()),
+                )
+            )
+        started_at = time.perf_counter()
+        await asyncio.gather(
+            *(
+                virtual_user.run(deadline=started_at + args.duration)
+                for virtual_user in virtual_users
+            )
+        )
+        elapsed = time.perf_counter() - started_at
+
+    return {
+        "parameters": {
+            "users": args.users,
+            "duration": args.duration,
+            "mix": args.mix,
+            "think_time": args.think_time,
+        },
+        "elapsed": round(elapsed, 3),
+        "total": summarize(
+            [
+                duration
+                for durations in recorder.durations.values()
+                for duration in durations
+            ],
+            elapsed,
+        ),
+        "endpoints": {
+            name: {
+                **summarize(durations, elapsed),
+                "statuses": dict(recorder.statuses[name]),
+            }
+            for name, durations in sorted(recorder.durations.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--manifest", default="benchmarks/manifest.json")
+    parser.add_argument("--users", type=int, default=50, help="concurrent users")
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument("--mix", default="cashier=6,chef=3,admin=1")
+    parser.add_argument(
+        "--think-time", type=float, default=0.5, help="mean seconds between steps"
+    )
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="compare with a previous results file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load(args))
+
+    print(f"{'endpoint':<55} {'count':>7} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, summary in {**results["endpoints"], "total": results["total"]}.items():
+        print(
+            f"{name:<55} {summary['count']:>7} {summary['throughput_rps']:>8}"
+            f" {summary['p50_ms']:>9} {summary['p95_ms']:>9} {summary['p99_ms']:>9}"
+        )
+    if args.output:
+        save_results(args.output, results)
+    if args.compare:
+        baseline = load_results(args.compare)
+        print(f"\np95 (ms) compared with {args.compare}:")
+        print_comparison(
+            compare_summaries(
+                {**results["endpoints"], "total": results["total"]},
+                {**baseline["endpoints"], "total": baseline["total"]},
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
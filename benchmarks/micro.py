@@ -0,0 +1,317 @@
+"""
+Micro-benchmarks of the hot helper-layer functions against a seeded database.
+
+    python -m benchmarks.micro --output benchmarks/results/micro.json
+    python -m benchmarks.micro --baseline benchmarks/results/micro.json
+
+Every benchmark runs inside a transaction that is rolled back, so the seeded
+data (and the results) stay the same from one run to the next. With
+--baseline the run fails when a median regressed more than --threshold.
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+from benchmarks.stats import (
+    compare_summaries,
+    load_results,
+    print_comparison,
+    save_results,
+    summarize,
+)
+from src import schemas
+from src.helpers import customer, menu_item, order, report
+from src.models.order import OrderStatus
+from src.security.jwt import create_access_token, verify_token
+from src.settings.database import engine
+from src.utils.fast_json import FastJSONResponse
+from src.utils.hashing import Hash
+
+# registered benchmarks: name -> (setup function, default number of iterations)
+BENCHMARKS: dict[str, tuple[Callable, int]] = {}
+
+
+def benchmark(name: str, iterations: int):
+    """
+    Register a benchmark, the decorated setup function receives the benchmark
+    context and returns the function to time
+    """
+
+    def decorator(setup: Callable) -> Callable:
+        BENCHMARKS[name] = (setup, iterations)
+        return setup
+
+    return decorator
+
+
+class Context:
+    """
+    What the benchmarks run against: a session in a rolled back transaction and
+    the first seeded shop of the manifest
+    """
+
+    def __init__(self, db: Session, manifest: dict, rng: random.Random):
+        self.db = db
+        self.rng = rng
+        self.password = manifest["password"]
+        self.shop = manifest["shops"][0]
+        self.to_date = date.today()
+        self.from_date = self.to_date - timedelta(days=30)
+
+
+@benchmark("order.place_an_order", iterations=200)
+def _place_an_order(context: Context) -> Callable:
+    shop = context.shop
+
+    def run():
+        order.place_an_order(
+            request=schemas.OrderPOSTRequestBody(
+                customer_details=schemas.CustomerPOSTRequestBody(
+                    name="Walk-in", phone_no=context.rng.choice(shop["customer_phones"])
+                ),
+                order_items=[
+                    schemas.MenuItemInPOSTOrderRequestBody(id=item, quantity=1)
+                    for item in context.rng.sample(shop["menu_item_ids"], 3)
+                ],
+            ),
+            coffee_shop_id=shop["id"],
+            issuer_id=shop["cashiers"][0]["id"],
+            db=context.db,
+        )
+
+    return run
+
+
+@benchmark("order._find_all_orders", iterations=200)
+def _find_all_orders(context: Context) -> Callable:
+    return lambda: order._find_all_orders(
+        db=context.db,
+        coffee_shop_id=context.shop["id"],
+        size=10,
+        page=1,
+        status=[OrderStatus.PENDING, OrderStatus.IN_PROGRESS],
+    )
+
+
+def _register_report_benchmarks() -> None:
+    periodic_reports = (
+        report.list_chefs_orders,
+        report.list_issuers_orders,
+        report.list_orders_income,
+        report.list_new_customers,
+        report.list_top_selling_items,
+    )
+    benchmark("report.list_customers_orders", iterations=20)(
+        lambda context: lambda: report.list_customers_orders(
+            db=context.db, coffee_shop_id=context.shop["id"]
+        )
+    )
+    for report_function in periodic_reports:
+        benchmark(f"report.{report_function.__name__}", iterations=20)(
+            lambda context, report_function=report_function: lambda: report_function(
+                db=context.db,
+                coffee_shop_id=context.shop["id"],
+                from_date=context.from_date,
+                to_date=context.to_date,
+            )
+        )
+
+
+_register_report_benchmarks()
+
+
+def _token_data(context: Context) -> dict:
+    admin = context.shop["admins"][0]
+    return {
+        "id": admin["id"],
+        "sub": admin["email"],
+        "role": "ADMIN",
+        "branch_id": 1,
+        "coffee_shop_id": context.shop["id"],
+    }
+
+
+@benchmark("jwt.create_access_token", iterations=1000)
+def _create_access_token(context: Context) -> Callable:
+    token_data = _token_data(context)
+    return lambda: create_access_token(dict(token_data))
+
+
+@benchmark("jwt.verify_token", iterations=1000)
+def _verify_token(context: Context) -> Callable:
+    token = create_access_token(_token_data(context))
+    return lambda: verify_token(token, Exception("invalid token"))
+
+
+@benchmark("hashing.Hash.verify", iterations=10)
+def _hash_verify(context: Context) -> Callable:
+    hashed_password = Hash.bcrypt_hash(context.password)
+    return lambda: Hash.verify(
+        plain_password=context.password, hashed_password=hashed_password
+    )
+
+
+@benchmark("schemas.OrderGETResponse[1000]", iterations=50)
+def _order_responses(context: Context) -> Callable:
+    now = datetime.now()
+    rows = [
+        {
+            "id": index,
+            "issue_date": now,
+            "issuer_id": 1,
+            "status": OrderStatus.PENDING,
+            "phone_no": f"+1555{index:08d}",
+            "items": [{"item_id": item, "quantity": 1} for item in range(3)],
+        }
+        for index in range(1000)
+    ]
+    return lambda: [schemas.OrderGETResponse(**row) for row in rows]
+
+
+def _validated_response(response_model, content) -> bytes:
+    """
+    Validate and serialize content through a response model the way FastAPI
+    does for a response_model, then encode it with the default JSON response
+    """
+    adapter = TypeAdapter(response_model)
+    validated = adapter.validate_python(content, from_attributes=True)
+    return JSONResponse(adapter.dump_python(validated, mode="json")).body
+
+
+# list endpoints served through the response_model and through the fast path
+@benchmark("response.orders[1000].validated", iterations=20)
+def _orders_validated(context: Context) -> Callable:
+    return lambda: _validated_response(
+        schemas.PaginatedOrderResponse,
+        order.get_all_orders_details(
+            status=None,
+            db=context.db,
+            coffee_shop_id=context.shop["id"],
+            page=1,
+            size=1000,
+        ),
+    )
+
+
+@benchmark("response.orders[1000].fast", iterations=20)
+def _orders_fast(context: Context) -> Callable:
+    return lambda: FastJSONResponse(
+        order.get_all_orders_details_rows(
+            status=None,
+            db=context.db,
+            coffee_shop_id=context.shop["id"],
+            page=1,
+            size=1000,
+        )
+    ).body
+
+
+@benchmark("response.customers.validated", iterations=20)
+def _customers_validated(context: Context) -> Callable:
+    return lambda: _validated_response(
+        list[schemas.CustomerResponse],
+        customer.find_all_customers(db=context.db, coffee_shop_id=context.shop["id"]),
+    )
+
+
+@benchmark("response.customers.fast", iterations=20)
+def _customers_fast(context: Context) -> Callable:
+    return lambda: FastJSONResponse(
+        customer.find_all_customers_rows(
+            db=context.db, coffee_shop_id=context.shop["id"]
+        )
+    ).body
+
+
+@benchmark("response.menu_items.validated", iterations=200)
+def _menu_items_validated(context: Context) -> Callable:
+    return lambda: _validated_response(
+        list[schemas.MenuItemResponse],
+        menu_item.find_all_menu_items(db=context.db, coffee_shop_id=context.shop["id"]),
+    )
+
+
+@benchmark("response.menu_items.fast", iterations=200)
+def _menu_items_fast(context: Context) -> Callable:
+    return lambda: FastJSONResponse(
+        menu_item.find_all_menu_items_rows(
+            db=context.db, coffee_shop_id=context.shop["id"]
+        )
+    ).body
+
+
+def run_benchmarks(args: argparse.Namespace) -> dict:
+    manifest = load_results(args.manifest)
+    results = {}
+    for name, (setup, iterations) in BENCHMARKS.items():
+        if args.filter and args.filter not in name:
+            continue
+        iterations = max(int(iterations * args.scale), 1)
+        with engine.connect() as connection:
+            transaction = connection.begin()
+            # helpers only flush, everything is rolled back with the transaction
+            db = Session(bind=connection, join_transaction_mode="create_savepoint")
+            try:
+                run = setup(Context(db, manifest, random.Random(args.seed)))
+                for _ in range(max(iterations // 10, 1)):
+                    run()
+                durations = []
+                for _ in range(iterations):
+                    started_at = time.perf_counter()
+                    run()
+                    durations.append(time.perf_counter() - started_at)
+                    db.expunge_all()
+            finally:
+                db.close()
+                transaction.rollback()
+        results[name] = summarize(durations)
+        print(
+            f"{name:<45} {iterations:>6} x  p50 {results[name]['p50_ms']:>9.3f} ms"
+            f"  p95 {results[name]['p95_ms']:>9.3f} ms"
+        )
+    return {"parameters": {"scale": args.scale}, "benchmarks": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--manifest", default="benchmarks/manifest.json")
+    parser.add_argument("--filter", help="only run the benchmarks matching this")
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiplier of the iterations"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--baseline", help="check the results against this file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="maximum allowed relative regression of the median",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+    if args.output:
+        save_results(args.output, results)
+    if not args.baseline:
+        return
+
+    comparison = compare_summaries(
+        results["benchmarks"], load_results(args.baseline)["benchmarks"], "p50_ms"
+    )
+    print(f"\np50 (ms) compared with {args.baseline}:")
+    print_comparison(comparison)
+    regressions = [name for name, *_, change in comparison if change > args.threshold]
+    if regressions:
+        print(f"\nregressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Seed a local Postgres database with benchmark data using COPY.
+
+    python -m benchmarks.seed --customers 100000 --orders 2000000 --truncate
+
+The database must be migrated (alembic upgrade head). The credentials and ids
+needed by the load generator are written to a manifest file.
+"""
+
+import argparse
+import io
+import json
+import random
+import re
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+import psycopg2
+from src.settings.settings import DATABASE_SETTINGS
+from src.utils.hashing import Hash
+
+# tables in dependency order, ids are generated by the seeder
+TABLES = (
+    "coffee_shop",
+    "branch",
+    '"user"',
+    "menu_item",
+    "inventory_item",
+    "customer",
+    '"order"',
+    "order_item",
+)
+SEQUENCE_TABLES = (
+    "coffee_shop",
+    "branch",
+    "user",
+    "menu_item",
+    "inventory_item",
+    "customer",
+    "order",
+)
+BENCHMARK_PASSWORD = "benchmark-password"
+
+
+class _LinesFile(io.TextIOBase):
+    """
+    Read-only file over an iterator of lines, lets COPY stream generated rows
+    without building them in memory
+    """
+
+    def __init__(self, lines: Iterator[str]):
+        self._lines = lines
+        self._buffer = ""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._lines)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+    def readline(self, size: int = -1) -> str:
+        return self.read(size)
+
+
+def _copy(cursor, table: str, columns: tuple[str, ...], rows: Iterable[tuple]):
+    lines = (
+        "\t".join("\\N" if value is None else str(value) for value in row) + "\n"
+        for row in rows
+    )
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN", _LinesFile(iter(lines))
+    )
+
+
+def _max_id(cursor, table: str) -> int:
+    cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM "{table}"')
+    return cursor.fetchone()[0]
+
+
+def _phone_no(customer_index: int) -> str:
+    return f"+1555{customer_index:08d}"
+
+
+def seed(cursor, args: argparse.Namespace) -> dict:
+    """
+    Generate and COPY the benchmark data
+    *Returns:
+        the manifest of the seeded shops (credentials, menu items and customers)
+    """
+    rng = random.Random(args.seed)
+    now = datetime.now()
+    password_hash = Hash.bcrypt_hash(BENCHMARK_PASSWORD)
+    first_ids = {table: _max_id(cursor, table) + 1 for table in SEQUENCE_TABLES}
+    run_tag = first_ids["coffee_shop"]
+
+    shop_ids = [first_ids["coffee_shop"] + index for index in range(args.shops)]
+    _copy(
+        cursor,
+        "coffee_shop",
+        ("id", "name", "location", "contact_info"),
+        (
+            (shop_id, f"Benchmark Shop {shop_id}", "Benchmark City", "benchmark")
+            for shop_id in shop_ids
+        ),
+    )
+
+    branches = {}
+    branch_id = first_ids["branch"]
+    for shop_id in shop_ids:
+        branches[shop_id] = list(range(branch_id, branch_id + args.branches))
+        branch_id += args.branches
+    _copy(
+        cursor,
+        "branch",
+        ("id", "name", "location", "deleted", "coffee_shop_id"),
+        (
+            (branch, f"Branch {branch}", "Benchmark City", False, shop_id)
+            for shop_id, shop_branches in branches.items()
+            for branch in shop_branches
+        ),
+    )
+
+    manifest = {"password": BENCHMARK_PASSWORD, "shops": []}
+    users = []
+    user_id = first_ids["user"]
+    for shop_id in shop_ids:
+        shop_manifest = {
+            "id": shop_id,
+            "admins": [],
+            "cashiers": [],
+            "chefs": [],
+            "menu_item_ids": [],
+            "customer_phones": [],
+        }
+        staff = [("ADMIN", "admins", branches[shop_id][0])]
+        for branch in branches[shop_id]:
+            staff += [("CASHIER", "cashiers", branch)] * args.cashiers
+            staff += [("CHEF", "chefs", branch)] * args.chefs
+        for role, manifest_key, branch in staff:
+            email = f"{role.lower()}{user_id}.{run_tag}@benchmark.local"
+            users.append(
+                (
+                    user_id,
+                    "Benchmark",
+                    f"{role.title()} {user_id}",
+                    email,
+                    f"+1444{user_id:08d}",
+                    password_hash,
+                    False,
+                    role,
+                    branch,
+                )
+            )
+            shop_manifest[manifest_key].append({"id": user_id, "email": email})
+            user_id += 1
+        manifest["shops"].append(shop_manifest)
+    _copy(
+        cursor,
+        '"user"',
+        (
+            "id",
+            "first_name",
+            "last_name",
+            "email",
+            "phone_no",
+            "password",
+            "deleted",
+            "role",
+            "branch_id",
+        ),
+        users,
+    )
+
+    menu_items = {}
+    menu_item_id = first_ids["menu_item"]
+    for shop_manifest in manifest["shops"]:
+        items = list(range(menu_item_id, menu_item_id + args.menu_items))
+        menu_items[shop_manifest["id"]] = items
+        shop_manifest["menu_item_ids"] = items
+        menu_item_id += args.menu_items
+    _copy(
+        cursor,
+        "menu_item",
+        ("id", "name", "description", "price", "deleted", "coffee_shop_id"),
+        (
+            (item, f"Item {item}", "benchmark item", rng.randint(2, 30), False, shop_id)
+            for shop_id, items in menu_items.items()
+            for item in items
+        ),
+    )
+
+    _copy(
+        cursor,
+        "inventory_item",
+        (
+            "id",
+            "name",
+            "price",
+            "expire_date",
+            "prod_date",
+            "available_quantity",
+            "deleted",
+            "coffee_shop_id",
+        ),
+        (
+            (
+                first_ids["inventory_item"] + index * args.shops + shop_index,
+                f"Inventory {index}",
+                rng.randint(1, 100),
+                (now + timedelta(days=90)).date(),
+                (now - timedelta(days=10)).date(),
+                rng.randint(0, 500),
+                False,
+                shop_id,
+            )
+            for index in range(args.inventory_items)
+            for shop_index, shop_id in enumerate(shop_ids)
+        ),
+    )
+
+    # customer i belongs to shop i % shops, the manifest keeps a sample of phones
+    first_customer_id = first_ids["customer"]
+    customer_offset = first_customer_id - 1
+    for shop_index, shop_manifest in enumerate(manifest["shops"]):
+        shop_manifest["customer_phones"] = [
+            _phone_no(customer_offset + index)
+            for index in range(shop_index, args.customers, args.shops)
+        ][: args.manifest_customers]
+    _copy(
+        cursor,
+        "customer",
+        ("id", "name", "phone_no", "coffee_shop_id", "created"),
+        (
+            (
+                first_customer_id + index,
+                f"Customer {first_customer_id + index}",
+                _phone_no(customer_offset + index),
+                shop_ids[index % args.shops],
+                now - timedelta(seconds=rng.randint(0, args.days * 86400)),
+            )
+            for index in range(args.customers)
+        ),
+    )
+
+    # orders are spread over the period, only the recent ones are still open
+    first_order_id = first_ids["order"]
+    orders_shops = [rng.randrange(args.shops) for _ in range(args.orders)]
+
+    def generate_orders() -> Iterator[tuple]:
+        for index, shop_index in enumerate(orders_shops):
+            shop_manifest = manifest["shops"][shop_index]
+            age = timedelta(seconds=rng.randint(0, args.days * 86400))
+            if age > timedelta(hours=2):
+                status = "CLOSED"
+            else:
+                status = rng.choice(("PENDING", "IN_PROGRESS", "COMPLETED"))
+            customer_index = shop_index + args.shops * rng.randrange(
+                max(args.customers // args.shops, 1)
+            )
+            yield (
+                first_order_id + index,
+                now - age,
+                first_customer_id + min(customer_index, args.customers - 1),
+                status,
+                rng.choice(shop_manifest["cashiers"])["id"],
+                (
+                    rng.choice(shop_manifest["chefs"])["id"]
+                    if status != "PENDING"
+                    else None
+                ),
+            )
+
+    _copy(
+        cursor,
+        '"order"',
+        ("id", "issue_date", "customer_id", "status", "issuer_id", "assigner_id"),
+        generate_orders(),
+    )
+
+    def generate_order_items() -> Iterator[tuple]:
+        for index, shop_index in enumerate(orders_shops):
+            items = menu_items[shop_ids[shop_index]]
+            for item in rng.sample(items, rng.randint(1, args.max_order_items)):
+                yield first_order_id + index, item, rng.randint(1, 3)
+
+    _copy(
+        cursor,
+        "order_item",
+        ("order_id", "item_id", "quantity"),
+        generate_order_items(),
+    )
+
+    for table in SEQUENCE_TABLES:
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+            f'(SELECT MAX(id) FROM "{table}"))'
+        )
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shops", type=int, default=10)
+    parser.add_argument("--branches", type=int, default=3, help="per shop")
+    parser.add_argument("--cashiers", type=int, default=3, help="per branch")
+    parser.add_argument("--chefs", type=int, default=2, help="per branch")
+    parser.add_argument("--menu-items", type=int, default=40, help="per shop")
+    parser.add_argument("--inventory-items", type=int, default=50, help="per shop")
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--max-order-items", type=int, default=4)
+    parser.add_argument("--days", type=int, default=365, help="orders period")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--manifest", default="benchmarks/manifest.json")
+    parser.add_argument(
+        "--manifest-customers",
+        type=int,
+        default=1000,
+        help="number of customer phones per shop kept in the manifest",
+    )
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help="delete ALL the data of the seeded tables before seeding",
+    )
+    args = parser.parse_args()
+    args.max_order_items = min(args.max_order_items, args.menu_items)
+
+    # psycopg2 takes a libpq URL, without the SQLAlchemy driver name
+    dsn = re.sub(r"^postgresql\+\w+://", "postgresql://", DATABASE_SETTINGS["URL"])
+    connection = psycopg2.connect(dsn)
+    try:
+        with connection, connection.cursor() as cursor:
+            if args.truncate:
+                cursor.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+            started_at = datetime.now()
+            manifest = seed(cursor, args)
+        for table in TABLES:
+            with connection, connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {table}")
+    finally:
+        connection.close()
+
+    with open(args.manifest, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    print(
+        f"seeded {args.shops} shops, {args.customers} customers and {args.orders}"
+        f" orders in {datetime.now() - started_at}, manifest: {args.manifest}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import json
+import math
+import subprocess
+from datetime import datetime
+from typing import Optional
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """
+    Compute a percentile with the nearest-rank method
+    *Args:
+        sorted_values (list[float]): the values, sorted in ascending order
+        fraction (float): the percentile as a fraction, e.g. 0.99 for p99
+    *Returns:
+        the percentile value, 0 if there are no values
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(durations: list[float], elapsed: Optional[float] = None) -> dict:
+    """
+    Summarize a list of durations (in seconds) into milliseconds percentiles
+    *Args:
+        durations (list[float]): the measured durations
+        elapsed (float): the wall time of the run, used to compute the throughput
+    *Returns:
+        a dict with count, throughput, mean, p50, p95, p99 and max
+    """
+    sorted_durations = sorted(durations)
+    summary = {
+        "count": len(sorted_durations),
+        "mean_ms": (
+            round(sum(sorted_durations) / len(sorted_durations) * 1000, 3)
+            if sorted_durations
+            else 0.0
+        ),
+        "p50_ms": round(percentile(sorted_durations, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(sorted_durations, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(sorted_durations, 0.99) * 1000, 3),
+        "max_ms": round(sorted_durations[-1] * 1000, 3) if sorted_durations else 0.0,
+    }
+    if elapsed:
+        summary["throughput_rps"] = round(len(sorted_durations) / elapsed, 2)
+    return summary
+
+
+def git_commit() -> Optional[str]:
+    """
+    Get the commit the benchmark runs on, None outside of a git checkout
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(path: str, results: dict) -> None:
+    """
+    Save benchmark results as JSON along with the run metadata
+    """
+    document = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        **results,
+    }
+    with open(path, "w") as results_file:
+        json.dump(document, results_file, indent=2)
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r") as results_file:
+        return json.load(results_file)
+
+
+def compare_summaries(
+    current: dict[str, dict], baseline: dict[str, dict], metric: str = "p95_ms"
+) -> list[tuple[str, float, float, float]]:
+    """
+    Compare the summaries of two runs on one metric
+    *Args:
+        current (dict): summaries of the current run, by name
+        baseline (dict): summaries of the baseline run, by name
+        metric (str): the compared metric
+    *Returns:
+        a list of (name, baseline value, current value, relative change) tuples
+        for the names present in both runs
+    """
+    comparison = []
+    for name, summary in current.items():
+        if name not in baseline:
+            continue
+        baseline_value = baseline[name][metric]
+        current_value = summary[metric]
+        change = (
+            (current_value - baseline_value) / baseline_value if baseline_value else 0.0
+        )
+        comparison.append((name, baseline_value, current_value, change))
+    return comparison
+
+
+def print_comparison(comparison: list[tuple[str, float, float, float]]) -> None:
+    for name, baseline_value, current_value, change in comparison:
+        print(
+            f"{name:<55} {baseline_value:>10.3f} -> {current_value:>10.3f}"
+            f" ({change:+.1%})"
+        )
@@ -1,5 +1,19 @@
 from uvicorn import run
-from src.main import app
+from src.settings.settings import SERVER_SETTINGS
 
 if __name__ == "__main__":
-    run(app, host="0.0.0.0", port=8000)
+    # the app is given as an import string so that every worker imports its own
+    # copy (and its own database pools). Send SIGHUP to the main process to restart
+    # the workers one by one, SIGTTIN / SIGTTOU to add or remove a worker
+    run(
+        "src.main:app",
+        host=SERVER_SETTINGS["HOST"],
+        port=SERVER_SETTINGS["PORT"],
+        workers=SERVER_SETTINGS["WORKERS"],
+        loop=SERVER_SETTINGS["LOOP"],
+        http=SERVER_SETTINGS["HTTP"],
+        timeout_keep_alive=SERVER_SETTINGS["KEEPALIVE_TIMEOUT"],
+        backlog=SERVER_SETTINGS["BACKLOG"],
+        limit_concurrency=SERVER_SETTINGS["LIMIT_CONCURRENCY"],
+        timeout_graceful_shutdown=SERVER_SETTINGS["GRACEFUL_SHUTDOWN_TIMEOUT"],
+    )
@@ -2,7 +2,8 @@ from src.models import UserRole
 from src import schemas
 from src.helpers import user, coffee_shop, branch
 from src.exceptions.exception import *
-from src.utils.hashing import Hash
+from src.utils.hashing import Hash, DUMMY_PASSWORD_HASH
+from src.utils.integrity import unique_violation_error
 from src.security.jwt import generate_token_for_user
 from sqlalchemy.orm import Session
 from fastapi import status
@@ -27,15 +28,6 @@ def signup(
     branch_instance: schemas.BranchBase = request.branch_details
     admin_user_instance: schemas.UserBase = request.admin_details
 
-    # check email or phone duplicates
-    if user._is_user_exist(
-        email=admin_user_instance.email, db=db
-    ) or user._is_user_exist(phone_no=admin_user_instance.phone_no, db=db):
-        raise ShopsAppException(
-            message="User with this email or phone number already exists.",
-            status_code=status.HTTP_400_BAD_REQUEST,
-        )
-
     # create coffee shop, branch and admin
     created_coffee_shop = coffee_shop._create_coffee_shop(
         request=coffee_shop_instance, db=db
@@ -43,12 +35,18 @@ def signup(
     created_branch = branch.create_branch(
         request=branch_instance, db=db, coffee_shop_id=created_coffee_shop.id
     )
-    created_admin_user = user._create_user(
-        request=admin_user_instance,
-        db=db,
-        role=UserRole.ADMIN,
-        branch_id=created_branch.id,
-    )
+    # the unique constraints reject the email or phone duplicates
+    with unique_violation_error(
+        constraints=user.USER_UNIQUE_CONSTRAINTS,
+        message="User with this email or phone number already exists.",
+        status_code=status.HTTP_400_BAD_REQUEST,
+    ):
+        created_admin_user = user._create_user(
+            request=admin_user_instance,
+            db=db,
+            role=UserRole.ADMIN,
+            branch_id=created_branch.id,
+        )
     return schemas.UserCredentialsInResponse(
         email=created_admin_user.email,
         phone_no=created_admin_user.phone_no,
@@ -65,23 +63,23 @@ def login(request: schemas.LoginRequestBody, db: Session) -> schemas.Token:
     *Returns:
         The JWT token for the user.
     """
-    # get the user using the email
-    current_user = user.find_user(email=request.username, db=db)
+    # get the user along with the coffee shop id of his/her branch
+    found_user = user._find_user_with_coffee_shop_id(email=request.username, db=db)
 
-    # verify password
-    if not Hash.verify(
-        plain_password=request.password, hashed_password=current_user.password
-    ):
+    # verify password, against a dummy hash if the user does not exist so that
+    # unknown and known emails cost the same
+    hashed_password = found_user[0].password if found_user else DUMMY_PASSWORD_HASH
+    is_password_valid = Hash.verify(
+        plain_password=request.password, hashed_password=hashed_password
+    )
+    if not found_user or not is_password_valid:
         raise ShopsAppException(
             message="Username or Password incorrect",
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
     # create jwt and return it
-    # get the coffee shop id
-    coffee_shop_id = branch._find_branch(
-        branch_id=current_user.branch_id, db=db
-    ).coffee_shop_id
+    current_user, coffee_shop_id = found_user
     access_token = generate_token_for_user(
         user=current_user, coffee_shop_id=coffee_shop_id
     )
@@ -3,6 +3,7 @@ from src import schemas, models
 from sqlalchemy.orm import Session
 from src.exceptions.exception import *
 from src.helpers import coffee_shop
+from src.utils import catalog_versions
 
 
 def create_branch(
@@ -24,8 +25,10 @@ def create_branch(
         name=request.name, location=request.location, coffee_shop_id=coffee_shop_id
     )
     db.add(created_branch)
-    db.commit()
-    db.refresh(created_branch)
+    db.flush()
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=coffee_shop_id, catalog=catalog_versions.BRANCHES
+    )
     return created_branch
 
 
@@ -98,8 +101,10 @@ def update_branch(
     )  # Get dictionary of all set fields in request
     for field, value in update_data.items():
         setattr(found_branch, field, value)
-    db.commit()
-    db.refresh(found_branch)
+    db.flush()
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=coffee_shop_id, catalog=catalog_versions.BRANCHES
+    )
     return found_branch
 
 
@@ -127,7 +132,10 @@ def delete_branch(db: Session, branch_id: int, coffee_shop_id: int) -> None:
             status_code=status.HTTP_409_CONFLICT,  # conflict error
         )
     found_branch.deleted = True
-    db.commit()
+    db.flush()
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=coffee_shop_id, catalog=catalog_versions.BRANCHES
+    )
 
 
 def find_all_branches(db: Session, coffee_shop_id: int) -> list[models.Branch]:
@@ -19,8 +19,7 @@ def _create_coffee_shop(
         **request.model_dump(exclude_unset=True)
     )
     db.add(created_shop_instance)
-    db.commit()
-    db.refresh(created_shop_instance)
+    db.flush()
     return created_shop_instance
 
 
@@ -65,8 +64,7 @@ def update_coffee_shop(
     )  # Get dictionary of all set fields in request
     for field, value in update_data.items():
         setattr(found_coffee_shop, field, value)
-    db.commit()
-    db.refresh(found_coffee_shop)
+    db.flush()
     return schemas.CoffeeShopResponse(
         name=found_coffee_shop.name,
         location=found_coffee_shop.location,
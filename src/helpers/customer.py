@@ -1,6 +1,32 @@
+import csv
+import io
+from datetime import datetime
+from typing import BinaryIO, Iterator
+from sqlalchemy import (
+    Column,
+    Float,
+    MetaData,
+    Row,
+    String,
+    Table,
+    delete,
+    func,
+    literal,
+    literal_column,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 from src import schemas, models
 from src.exceptions import ShopsAppException
+from src.settings.database import SessionLocal
+from src.settings.settings import IMPORT_SETTINGS, RESPONSE_SETTINGS
+from src.utils.fast_json import dumps
+from src.utils.integrity import unique_violation_error
+from src.utils.pagination import decode_cursor, encode_cursor
+from src.utils.phone_numbers import is_valid_phone_no, normalize_phone_no
 from fastapi import status
 
 
@@ -9,7 +35,6 @@ def _find_customer(
     phone_no: str = None,
     customer_id: int = None,
     coffee_shop_id: int = None,
-    exclude_customer_ids: list[int] = None,
 ) -> models.Customer:
     """
     This helper function used to get a customer by phone number/id and shop id.
@@ -31,49 +56,104 @@ def _find_customer(
         raise Exception("phone_no or customer_id must be provided")
     if coffee_shop_id:
         query = query.filter(models.Customer.coffee_shop_id == coffee_shop_id)
-    if exclude_customer_ids:
-        query = query.filter(models.Customer.id.notin_(exclude_customer_ids))
     return query.first()
 
 
+def upsert_customers(
+    customers: list[schemas.CustomerPOSTRequestBody],
+    db: Session,
+    coffee_shop_id: int,
+) -> dict[str, Row]:
+    """
+    This helper function used to create the customers that do not exist yet in a
+    specific shop and get the ids of all of them in a single statement:
+    an INSERT .. ON CONFLICT DO NOTHING on the unique (phone_no, coffee_shop_id)
+    constraint, so concurrent orders of a new customer never race, combined with
+    the SELECT of the customers that already existed. The existing customers are
+    not modified.
+    *Args:
+        customers (list[schemas.CustomerPOSTRequestBody]): the customer details,
+        the first details of a repeated phone number are used
+        db (Session): SQLAlchemy Session object
+        coffee_shop_id (int): the id of the coffee shop of the customers
+    *Returns:
+        the (id, phone_no) rows of the customers by phone number
+    """
+    new_customers = {}
+    for customer in customers:
+        new_customers.setdefault(customer.phone_no, customer)
+    created = datetime.now()
+    inserted = (
+        insert(models.Customer)
+        .values(
+            [
+                {
+                    "name": customer.name,
+                    "phone_no": customer.phone_no,
+                    "coffee_shop_id": coffee_shop_id,
+                    "created": created,
+                }
+                for customer in new_customers.values()
+            ]
+        )
+        .on_conflict_do_nothing(constraint="unique_phone_shop")
+        .returning(models.Customer.id, models.Customer.phone_no)
+        .cte("inserted")
+    )
+
+    def select_existing(phone_numbers):
+        return select(models.Customer.id, models.Customer.phone_no).where(
+            models.Customer.coffee_shop_id == coffee_shop_id,
+            models.Customer.phone_no.in_(phone_numbers),
+        )
+
+    query = select(inserted.c.id, inserted.c.phone_no).union_all(
+        select_existing(list(new_customers))
+    )
+    found_customers = {row.phone_no: row for row in db.execute(query)}
+
+    # a customer created by a concurrent transaction that committed while the
+    # statement ran is neither inserted nor in its snapshot, read it again
+    missing_phone_numbers = [
+        phone_no for phone_no in new_customers if phone_no not in found_customers
+    ]
+    if missing_phone_numbers:
+        found_customers.update(
+            (row.phone_no, row)
+            for row in db.execute(select_existing(missing_phone_numbers))
+        )
+    return found_customers
+
+
 def _create_customer(
     request: schemas.CustomerPOSTRequestBody,
     db: Session,
     coffee_shop_id: int,
-):
+) -> Row:
     """
     This helper function used to create a new customer if not exists in a specific shop,
      else returns that customer
     *Args:
         request (schemas.CustomerPOSTRequestBody): contains customer details
     *Returns:
-        the Customer instance
+        the (id, phone_no) row of the customer
     """
-    customer_instance = _find_customer(
-        db, phone_no=request.phone_no, coffee_shop_id=coffee_shop_id
-    )
-    if not customer_instance:
-        customer_instance = models.Customer(
-            phone_no=request.phone_no,
-            name=request.name,
-            coffee_shop_id=coffee_shop_id,
-        )
-        db.add(customer_instance)
-        db.commit()
-        db.refresh(customer_instance)
-    return customer_instance
+    return upsert_customers(customers=[request], db=db, coffee_shop_id=coffee_shop_id)[
+        request.phone_no
+    ]
 
 
 def _validate_customer_on_update(
-    customer_id: int, coffee_shop_id: int, db: Session, customer_phone_no: str
+    customer_id: int, coffee_shop_id: int, db: Session
 ) -> models.Customer:
     """
-    This helper function used to validate the customer before updating.
+    This helper function used to validate the customer before updating, the
+    phone number uniqueness is enforced by the unique_phone_shop constraint when
+    the customer is written
     *Args:
         customer_id (int): the id of the customer needed to be updated
         coffee_shop_id (int): the id of the coffee shop in which the customer exists
         db (Session): SQLAlchemy Session object
-        customer_phone_no (str): the phone number of the customer that must be unique
     *Returns:
         Raise Exceptions in case of violation, return the customer instance otherwise
     """
@@ -86,18 +166,6 @@ def _validate_customer_on_update(
             message="Customer Not found", status_code=status.HTTP_404_NOT_FOUND
         )
 
-    # validate customer phone number uniqueness
-    if _find_customer(
-        db=db,
-        phone_no=customer_phone_no,
-        coffee_shop_id=coffee_shop_id,
-        exclude_customer_ids=[customer_id],
-    ):
-        raise ShopsAppException(
-            message="Phone number already exists",
-            status_code=status.HTTP_400_BAD_REQUEST,
-        )
-
     return found_customer
 
 
@@ -122,7 +190,6 @@ def update_customer(
         customer_id=customer_id,
         db=db,
         coffee_shop_id=coffee_shop_id,
-        customer_phone_no=request.phone_no,
     )
 
     # Update all fields of the customer
@@ -132,8 +199,12 @@ def update_customer(
     for field, value in update_data.items():
         setattr(customer_instance, field, value)
 
-    db.commit()
-    db.refresh(customer_instance)
+    with unique_violation_error(
+        constraints=("unique_phone_shop",),
+        message="Phone number already exists",
+        status_code=status.HTTP_400_BAD_REQUEST,
+    ):
+        db.flush()
     return schemas.CustomerResponse(
         id=customer_instance.id,
         name=customer_instance.name,
@@ -142,29 +213,289 @@ def update_customer(
     )
 
 
-def find_all_customers(
+# the columns of schemas.CustomerResponse
+CUSTOMER_RESPONSE_COLUMNS = (
+    models.Customer.id,
+    models.Customer.name,
+    models.Customer.phone_no,
+    models.Customer.coffee_shop_id,
+)
+
+
+def find_customers_page(
     db: Session,
     coffee_shop_id: int,
+    size: int,
+    sort_by: str = "id",
+    cursor: str = None,
     customer_phone_no: str = None,
     customer_name: str = None,
-) -> list[models.Customer]:
+) -> dict:
     """
-    This helper function used to get all customers or querying by phone number or name
+    This helper function used to get a page of the customers of a shop, querying
+    by phone number or name. The pages use keyset pagination: a page starts
+    right after the key (id, or creation time and id) of the last customer of
+    the previous one, so every page is a range scan of the index of the shop
     *Args:
         db (Session): SQLAlchemy Session object
+        coffee_shop_id (int): the id of the coffee shop
+        size (int): the maximum number of customers of the page
+        sort_by (str): the sort order, id or created
+        cursor (str): the next_cursor of the previous page, None for the first page
         customer_phone_no (str): Phone number to get a customer by phone number
         customer_name (str): Name to get a customer by name
     *Returns:
-        list[models.Customer]: List of customers
+        a dict with the shape of schemas.PaginatedCustomerResponse
     """
-    query = db.query(models.Customer).filter(
-        models.Customer.coffee_shop_id == coffee_shop_id
+    # the sort columns with the parser of their value in the cursor
+    sort_columns, cursor_types = (models.Customer.id,), (int,)
+    if sort_by == "created":
+        sort_columns = (models.Customer.created, models.Customer.id)
+        cursor_types = (datetime.fromisoformat, int)
+
+    query = (
+        select(*CUSTOMER_RESPONSE_COLUMNS, models.Customer.created)
+        .where(models.Customer.coffee_shop_id == coffee_shop_id)
+        .order_by(*sort_columns)
+        # one more customer tells if there is a next page
+        .limit(size + 1)
     )
     if customer_phone_no:
-        query = query.filter(models.Customer.phone_no == customer_phone_no)
+        query = query.where(
+            models.Customer.phone_no == normalize_phone_no(customer_phone_no)
+        )
     if customer_name:
-        query = query.filter(models.Customer.name == customer_name)
-    return query.all()
+        query = query.where(models.Customer.name == customer_name)
+    if cursor:
+        query = query.where(
+            tuple_(*sort_columns) > tuple_(*decode_cursor(cursor, cursor_types))
+        )
+
+    rows = [dict(row) for row in db.execute(query).mappings()]
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor(
+            tuple(rows[-1][column.key] for column in sort_columns)
+        )
+    for row in rows:
+        del row["created"]
+    return {"page_size": size, "next_cursor": next_cursor, "customers": rows}
+
+
+def export_customers(bind: Engine, coffee_shop_id: int) -> Iterator[bytes]:
+    """
+    This helper function used to stream all the customers of a shop as NDJSON
+    (one JSON object per line). The customers are fetched in batches from a
+    server-side cursor, so the memory used does not depend on the number of
+    customers. The request session is closed before a streamed response is
+    sent, the export reads with a session of its own
+    *Args:
+        bind (Engine): the engine (lane pool) to read the customers with
+        coffee_shop_id (int): the id of the coffee shop
+    *Returns:
+        an iterator over the NDJSON chunks, one per batch of customers
+    """
+    query = (
+        select(*CUSTOMER_RESPONSE_COLUMNS)
+        .where(models.Customer.coffee_shop_id == coffee_shop_id)
+        .order_by(models.Customer.id)
+        .execution_options(yield_per=RESPONSE_SETTINGS["EXPORT_BATCH_SIZE"])
+    )
+    with SessionLocal(bind=bind) as db:
+        for rows in db.execute(query).mappings().partitions():
+            yield b"".join(dumps(dict(row)) + b"\n" for row in rows)
+
+
+# the names further than this (1 - word similarity) from the search are dropped
+NAME_SEARCH_MAX_DISTANCE = 0.7
+
+
+def search_customers(
+    db: Session, coffee_shop_id: int, search: str, limit: int
+) -> list[dict]:
+    """
+    This helper function used to find the customers of a shop by a part of their
+    phone number or by a part of their name, even misspelled. A search made of
+    digits looks for the phone numbers that contain them, any other search
+    returns the customers with the most similar names first, both use the
+    trigram indexes of the shop
+    *Args:
+        db (Session): SQLAlchemy Session object
+        coffee_shop_id (int): the id of the coffee shop
+        search (str): the searched part of a phone number or name
+        limit (int): the maximum number of customers
+    *Returns:
+        list[dict]: the found customers, with the columns of schemas.CustomerResponse
+    """
+    columns = CUSTOMER_RESPONSE_COLUMNS
+    phone_no = normalize_phone_no(search)
+    if phone_no.lstrip("+").isdigit():
+        query = (
+            select(*columns)
+            .where(
+                models.Customer.coffee_shop_id == coffee_shop_id,
+                # only digits and +, nothing to escape
+                models.Customer.phone_no.like(f"%{phone_no}%"),
+            )
+            .order_by(models.Customer.phone_no, models.Customer.id)
+            .limit(limit)
+        )
+        return [dict(row) for row in db.execute(query).mappings()]
+
+    # nearest neighbours of the index, the distance is 1 - word_similarity
+    distance = models.Customer.name.op("<->>", return_type=Float)(search)
+    query = (
+        select(*columns, distance.label("distance"))
+        .where(models.Customer.coffee_shop_id == coffee_shop_id)
+        .order_by(distance)
+        .limit(limit)
+    )
+    return [
+        {column.key: row[column.key] for column in columns}
+        for row in db.execute(query).mappings()
+        if row["distance"] <= NAME_SEARCH_MAX_DISTANCE
+    ]
+
+
+# the staging table the imported rows are copied into, it is created by each
+# import and dropped at the end of its transaction
+_customer_import = Table(
+    "customer_import",
+    MetaData(),
+    Column("name", String),
+    Column("phone_no", String),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+
+def _merge_customers_chunk(
+    db: Session, chunk: dict[str, tuple[int, str]], coffee_shop_id: int
+) -> tuple[int, int]:
+    """
+    This helper function used to write a chunk of imported customers: the rows
+    are COPYed into the staging table, then moved into the customers of the
+    shop with a single INSERT .. ON CONFLICT on the unique (phone_no,
+    coffee_shop_id) constraint. The name of an existing customer is updated,
+    the customers whose name did not change are not written
+    *Args:
+        db (Session): SQLAlchemy Session object
+        chunk (dict[str, tuple[int, str]]): the (line, name) of each phone number
+        coffee_shop_id (int): the id of the coffee shop of the customers
+    *Returns:
+        the number of inserted and updated customers
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        (name, phone_no) for phone_no, (_, name) in chunk.items()
+    )
+    buffer.seek(0)
+    with db.connection().connection.cursor() as cursor:
+        cursor.copy_expert(
+            "COPY customer_import (name, phone_no) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+
+    # the staging table is emptied by the statement that reads it
+    staged = (
+        delete(_customer_import)
+        .returning(_customer_import.c.name, _customer_import.c.phone_no)
+        .cte("staged")
+    )
+    query = insert(models.Customer).from_select(
+        ["name", "phone_no", "coffee_shop_id", "created"],
+        select(
+            staged.c.name,
+            staged.c.phone_no,
+            literal(coffee_shop_id),
+            func.localtimestamp(),
+        ),
+    )
+    query = (
+        query.on_conflict_do_update(
+            constraint="unique_phone_shop",
+            set_={"name": query.excluded.name},
+            where=models.Customer.name.is_distinct_from(query.excluded.name),
+        )
+        # xmax is 0 for the inserted rows, the id of the transaction for the updated ones
+        .returning(literal_column("xmax") == 0).add_cte(staged)
+    )
+    inserted_flags = db.execute(query).scalars().all()
+    inserted = sum(inserted_flags)
+    return inserted, len(inserted_flags) - inserted
+
+
+def import_customers(file: BinaryIO, db: Session, coffee_shop_id: int) -> dict:
+    """
+    This helper function used to import the customers of a CSV file with name and
+    phone_no columns into a shop. The file is read and written in chunks, so
+    the memory used does not depend on its size. The phone numbers are
+    normalized, the new customers are inserted and the names of the existing
+    ones are updated, the invalid rows are rejected
+    *Args:
+        file (BinaryIO): the CSV file
+        db (Session): SQLAlchemy Session object
+        coffee_shop_id (int): the id of the coffee shop of the customers
+    *Returns:
+        a dict with the shape of schemas.CustomerImportResponse
+    """
+    reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+    summary = {"inserted": 0, "updated": 0, "unchanged": 0, "rejected": 0}
+    errors = []
+
+    def reject(line: int, reason: str) -> None:
+        summary["rejected"] += 1
+        if len(errors) < IMPORT_SETTINGS["MAX_REPORTED_ERRORS"]:
+            errors.append({"line": line, "reason": reason})
+
+    def write(chunk: dict[str, tuple[int, str]]) -> None:
+        inserted, updated = _merge_customers_chunk(
+            db=db, chunk=chunk, coffee_shop_id=coffee_shop_id
+        )
+        summary["inserted"] += inserted
+        summary["updated"] += updated
+        summary["unchanged"] += len(chunk) - inserted - updated
+
+    try:
+        if not {"name", "phone_no"}.issubset(reader.fieldnames or ()):
+            raise ShopsAppException(
+                message="The CSV file must have name and phone_no columns",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        _customer_import.create(db.connection())
+        chunk: dict[str, tuple[int, str]] = {}
+        for row in reader:
+            name = (row["name"] or "").strip()
+            phone_no = normalize_phone_no(row["phone_no"] or "")
+            if not name:
+                reject(reader.line_num, "The name is missing")
+            elif not is_valid_phone_no(phone_no):
+                reject(reader.line_num, "The phone number is not valid")
+            elif phone_no in chunk:
+                # a row can only be written once by an INSERT .. ON CONFLICT
+                reject(
+                    reader.line_num,
+                    f"The phone number is repeated from line {chunk[phone_no][0]}",
+                )
+            else:
+                chunk[phone_no] = (reader.line_num, name)
+                if len(chunk) == IMPORT_SETTINGS["CHUNK_SIZE"]:
+                    write(chunk)
+                    chunk = {}
+        if chunk:
+            write(chunk)
+    except csv.Error as e:
+        raise ShopsAppException(
+            message=f"The CSV file is not valid (line {reader.line_num}): {e}",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    except UnicodeDecodeError:
+        raise ShopsAppException(
+            message="The CSV file must be encoded in UTF-8",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    return {**summary, "errors": errors}
 
 
 def get_customer_details(
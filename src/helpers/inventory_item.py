@@ -3,6 +3,7 @@ from datetime import date
 from src import schemas, models
 from sqlalchemy.orm import Session
 from src.helpers import coffee_shop
+from src.utils import catalog_versions
 from src.exceptions.exception import *
 
 
@@ -56,8 +57,10 @@ def create_inventory_item(
         coffee_shop_id=coffee_shop_id,
     )
     db.add(created_inventory_item)
-    db.commit()
-    db.refresh(created_inventory_item)
+    db.flush()
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=coffee_shop_id, catalog=catalog_versions.INVENTORY
+    )
     return created_inventory_item
 
 
@@ -141,8 +144,10 @@ def update_inventory_item(
     )  # Get dictionary of all set fields in request
     for field, value in update_data.items():
         setattr(found_inventory_item, field, value)
-    db.commit()
-    db.refresh(found_inventory_item)
+    db.flush()
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=admin_coffee_shop_id, catalog=catalog_versions.INVENTORY
+    )
     return found_inventory_item
 
 
@@ -167,4 +172,7 @@ def delete_inventory_item(
     )
 
     found_inventory_item.deleted = True
-    db.commit()
+    db.flush()
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=admin_coffee_shop_id, catalog=catalog_versions.INVENTORY
+    )
@@ -1,8 +1,11 @@
 from datetime import date
 from src import schemas, models
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from src.helpers import coffee_shop
 from src.exceptions.exception import *
+from src.settings.settings import CACHE_SETTINGS
+from src.utils import catalog_versions
 
 
 def create_menu_item(
@@ -27,8 +30,10 @@ def create_menu_item(
         coffee_shop_id=coffee_shop_id,
     )
     db.add(created_menu_item)
-    db.commit()
-    db.refresh(created_menu_item)
+    db.flush()
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=coffee_shop_id, catalog=catalog_versions.MENU
+    )
     return created_menu_item
 
 
@@ -76,6 +81,54 @@ def find_all_menu_items(coffee_shop_id: int, db: Session) -> list[models.MenuIte
     return query.all()
 
 
+def find_all_menu_items_rows(coffee_shop_id: int, db: Session) -> list[dict]:
+    """
+    Same as find_all_menu_items, but the menu items are selected as plain rows
+    with the columns of schemas.MenuItemResponse, without building ORM objects
+    *Args:
+        coffee_shop_id (int): the id of the coffee shop
+        db (Session): the database session
+    *Returns:
+        the found menu items
+    """
+    query = select(
+        models.MenuItem.id,
+        models.MenuItem.name,
+        models.MenuItem.description,
+        models.MenuItem.price,
+    ).where(
+        models.MenuItem.deleted == False,
+        models.MenuItem.coffee_shop_id == coffee_shop_id,
+    )
+    return [dict(row) for row in db.execute(query).mappings()]
+
+
+# the menu of each shop by menu item id, reloaded when the menu version changes
+_menu_cache = catalog_versions.VersionedCache(
+    name="menu",
+    catalog=catalog_versions.MENU,
+    loader=lambda db, coffee_shop_id: {
+        row["id"]: row
+        for row in find_all_menu_items_rows(coffee_shop_id=coffee_shop_id, db=db)
+    },
+    max_entries=CACHE_SETTINGS["MENU_MAX_SHOPS"],
+)
+
+
+def find_menu(coffee_shop_id: int, db: Session) -> dict[int, dict]:
+    """
+    This helper function will be used to get the menu of a specific coffee shop
+    from the in-process cache, it is loaded from the database when it changed.
+    *Args:
+        coffee_shop_id (int): the id of the coffee shop
+        db (Session): the database session
+    *Returns:
+        the menu items (with the columns of schemas.MenuItemResponse) by id,
+        shared between requests so it must not be modified
+    """
+    return _menu_cache.get(db=db, coffee_shop_id=coffee_shop_id)
+
+
 def update_menu_item(
     request: schemas.MenuItemPUTRequestBody,
     db: Session,
@@ -102,8 +155,10 @@ def update_menu_item(
     )  # Get dictionary of all set fields in request
     for field, value in update_data.items():
         setattr(found_menu_item, field, value)
-    db.commit()
-    db.refresh(found_menu_item)
+    db.flush()
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=admin_coffee_shop_id, catalog=catalog_versions.MENU
+    )
     return found_menu_item
 
 
@@ -124,4 +179,7 @@ def delete_menu_item(db: Session, menu_item_id: int, admin_coffee_shop_id: int)
     )
 
     found_menu_item.deleted = True
-    db.commit()
+    db.flush()
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=admin_coffee_shop_id, catalog=catalog_versions.MENU
+    )
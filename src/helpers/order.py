@@ -1,6 +1,7 @@
 import datetime
 from datetime import datetime
-from sqlalchemy import func
+from sqlalchemy import func, literal_column, select
+from sqlalchemy import event
 from sqlalchemy.orm import Session, joinedload
 from fastapi import status
 from src import schemas, models
@@ -9,6 +10,7 @@ from src.helpers import customer, menu_item, user, coffee_shop
 from src.models.order import OrderStatus
 from src.models.user import UserRole
 from src.definition import ROLE_STATUS_MAPPING
+from src.utils.metrics import ORDERS_PLACED, ORDER_STATUS_TRANSITION
 from collections import defaultdict
 from fastapi import status
 from sqlalchemy.exc import SQLAlchemyError
@@ -27,10 +29,13 @@ def _validate_order_items(
     *Returns:
         raise ShopsAppException in case of violation
     """
+    menu = menu_item.find_menu(coffee_shop_id=coffee_shop_id, db=db)
     for item in items_list:
-        menu_item._find_menu_item(
-            db=db, menu_item_id=item.id, coffee_shop_id=coffee_shop_id
-        )
+        if item.id not in menu:
+            raise ShopsAppException(
+                message=f"This item with id = {item.id} does not exist",
+                status_code=status.HTTP_404_NOT_FOUND,
+            )
 
 
 def _create_order(
@@ -49,31 +54,28 @@ def _create_order(
         the created order instance
     """
 
-    created_order = models.Order(
-        customer_id=customer_id,
-        issuer_id=issuer_id,
-        status=OrderStatus.PENDING,
-        issue_date=datetime.now(),
-    )
-    db.add(created_order)
-    db.commit()
-    db.refresh(created_order)
-
     # sum quantities of items with the same id
     item_quantities = defaultdict(int)
     for item in order_items:
         item_quantities[item.id] += item.quantity
 
-    # Create order details after aggregation
-    for item_id, total_quantity in item_quantities.items():
-        db.add(
+    # Create the order with its details after aggregation, the flush inserts the
+    # order (returning its id) then all of its items in one statement
+    created_order = models.Order(
+        customer_id=customer_id,
+        issuer_id=issuer_id,
+        status=OrderStatus.PENDING,
+        issue_date=datetime.now(),
+        items=[
             models.OrderItem(
-                order_id=created_order.id,
                 item_id=item_id,
                 quantity=total_quantity,  # Use aggregated quantity
             )
-        )
-    db.commit()  # commit after adding all items
+            for item_id, total_quantity in item_quantities.items()
+        ],
+    )
+    db.add(created_order)
+    db.flush()
 
     return created_order
 
@@ -112,6 +114,8 @@ def place_an_order(
         db=db,
         order_items=order_items,
     )
+    # counted once the transaction commits, see _count_committed_orders
+    db.info["placed_orders"] = db.info.get("placed_orders", 0) + 1
 
     return schemas.OrderPOSTResponse(
         id=created_order.id,
@@ -120,6 +124,18 @@ def place_an_order(
     )
 
 
+@event.listens_for(Session, "after_commit")
+def _count_committed_orders(session: Session) -> None:
+    placed_orders = session.info.pop("placed_orders", 0)
+    if placed_orders:
+        ORDERS_PLACED.inc(placed_orders)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_orders(session: Session) -> None:
+    session.info.pop("placed_orders", None)
+
+
 def _find_order(order_id: int, db: Session, coffee_shop_id: int = None) -> models.Order:
     """
     This helper function used to find a specific order
@@ -253,6 +269,73 @@ def get_all_orders_details(
     )
 
 
+def get_all_orders_details_rows(
+    status: list[OrderStatus], db: Session, coffee_shop_id: int, page: int, size: int
+) -> dict:
+    """
+    Same as get_all_orders_details, but the page is built directly from SQL rows
+    without ORM objects: the items of each order are aggregated by postgres
+    (json_agg), so the page is read with one statement plus the count
+    *Args:
+        status (str): the status of the orders needed to be retrieved
+        db (Session): a database session
+        coffee_shop_id (int): id of the coffee shop to find the orders for
+        page (int): the page number, needed to calculate the offset to skip
+        size (int): the maximum limit of orders to return in the page
+    *Returns:
+        a dict with the shape of schemas.PaginatedOrderResponse
+    """
+    filters = [models.Customer.coffee_shop_id == coffee_shop_id]
+    if status:
+        filters.append(models.Order.status.in_(status))
+
+    total_count: int = db.execute(
+        select(func.count())
+        .select_from(models.Order)
+        .join(models.Customer)
+        .where(*filters)
+    ).scalar_one()
+
+    orders_page = (
+        select(
+            models.Order.id,
+            models.Order.issue_date,
+            models.Order.issuer_id,
+            models.Order.status,
+            models.Customer.phone_no,
+        )
+        .join(models.Customer)
+        .where(*filters)
+        .order_by(models.Order.id)
+        .offset((page - 1) * size)
+        .limit(size)
+        .subquery()
+    )
+    items = func.coalesce(
+        func.json_agg(
+            func.json_build_object(
+                "item_id",
+                models.OrderItem.item_id,
+                "quantity",
+                models.OrderItem.quantity,
+            )
+        ).filter(models.OrderItem.order_id.is_not(None)),
+        literal_column("'[]'::json"),
+    )
+    query = (
+        select(orders_page, items.label("items"))
+        .outerjoin(models.OrderItem, models.OrderItem.order_id == orders_page.c.id)
+        .group_by(*orders_page.c)
+        .order_by(orders_page.c.id)
+    )
+    return {
+        "total_count": total_count,
+        "page": page,
+        "page_size": size,
+        "orders": [dict(row) for row in db.execute(query).mappings()],
+    }
+
+
 def _validate_status_change(new_status: str, user_role: str) -> None:
     """
     This helper function used to validate the change in the status of the order
@@ -293,7 +376,11 @@ def update_order_status(
     found_order = _find_order(order_id=order_id, coffee_shop_id=coffee_shop_id, db=db)
     _validate_status_change(new_status=request.status.value, user_role=user_role)
     found_order.status = request.status
-    db.commit()
+    db.flush()
+    ORDER_STATUS_TRANSITION.observe(
+        (datetime.now() - found_order.issue_date).total_seconds(),
+        status=request.status.value,
+    )
 
 
 def assign_order(
@@ -321,4 +408,4 @@ def assign_order(
         )
 
     found_order.assigner_id = found_user.id
-    db.commit()
+    db.flush()
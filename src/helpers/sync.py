@@ -0,0 +1,152 @@
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from src import models
+from src.models.user import UserRole
+
+# the roles allowed to sync each entity, the same roles that can list it
+SYNC_ENTITY_ROLES = {
+    "menu_items": (
+        UserRole.ADMIN,
+        UserRole.ORDER_RECEIVER,
+        UserRole.CASHIER,
+        UserRole.CHEF,
+    ),
+    "inventory_items": (UserRole.ADMIN,),
+    "customers": (UserRole.ADMIN,),
+    "branches": (UserRole.ADMIN,),
+    "users": (UserRole.ADMIN,),
+}
+
+
+def _current_checkpoint(db: Session) -> int:
+    """
+    This helper function used to get the checkpoint of the next sync: the oldest
+    transaction still in progress. Every transaction older than it has ended, so
+    all its changes are visible, the changes of the newer ones will be returned
+    by the next sync (some of them twice)
+    *Args:
+        db (Session): a database session
+    *Returns:
+        the checkpoint
+    """
+    return db.execute(
+        text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+    ).scalar_one()
+
+
+def _find_changed_rows(
+    db: Session, model, columns: list, scope_filter, since: int
+) -> list[dict]:
+    """
+    This helper function used to select the given columns of the rows of a model
+    changed since a checkpoint, the soft-deleted rows are only returned to
+    clients that already synced (since > 0)
+    *Args:
+        db (Session): a database session
+        model: the SQLAlchemy model
+        columns (list): the selected columns
+        scope_filter: the filter of the rows of the shop
+        since (int): the checkpoint of the client
+    *Returns:
+        the changed rows
+    """
+    if hasattr(model, "deleted"):
+        columns = [*columns, func.coalesce(model.deleted, False).label("deleted")]
+    query = (
+        select(*columns, model.updated_at)
+        .where(scope_filter, model.change_seq >= since)
+        .order_by(model.change_seq, model.id)
+    )
+    if since == 0 and hasattr(model, "deleted"):
+        query = query.where(func.coalesce(model.deleted, False) == False)
+    return [dict(row) for row in db.execute(query).mappings()]
+
+
+def find_changes(db: Session, coffee_shop_id: int, since: int, role: UserRole) -> dict:
+    """
+    This helper function used to get the menu items, inventory items, customers,
+    branches and users of a shop changed since the checkpoint of a client
+    *Args:
+        db (Session): a database session
+        coffee_shop_id (int): the id of the coffee shop
+        since (int): the checkpoint returned by the previous sync, 0 for the first one
+        role (UserRole): the role of the user, only the entities it can list are returned
+    *Returns:
+        the new checkpoint and the changed rows of each entity
+    """
+    # the checkpoint is taken before reading the rows, so no change is missed
+    changes = {"checkpoint": _current_checkpoint(db=db)}
+
+    # entity: (model, selected columns, filter of the rows of the shop)
+    entities = {
+        "menu_items": (
+            models.MenuItem,
+            [
+                models.MenuItem.id,
+                models.MenuItem.name,
+                models.MenuItem.description,
+                models.MenuItem.price,
+            ],
+            models.MenuItem.coffee_shop_id == coffee_shop_id,
+        ),
+        "inventory_items": (
+            models.InventoryItem,
+            [
+                models.InventoryItem.id,
+                models.InventoryItem.name,
+                models.InventoryItem.price,
+                models.InventoryItem.expire_date,
+                models.InventoryItem.prod_date,
+                models.InventoryItem.available_quantity,
+            ],
+            models.InventoryItem.coffee_shop_id == coffee_shop_id,
+        ),
+        "customers": (
+            models.Customer,
+            [
+                models.Customer.id,
+                models.Customer.name,
+                models.Customer.phone_no,
+                models.Customer.coffee_shop_id,
+            ],
+            models.Customer.coffee_shop_id == coffee_shop_id,
+        ),
+        "branches": (
+            models.Branch,
+            [
+                models.Branch.id,
+                models.Branch.name,
+                models.Branch.location,
+                models.Branch.coffee_shop_id,
+            ],
+            models.Branch.coffee_shop_id == coffee_shop_id,
+        ),
+        # the users of all the branches of the shop, without their password
+        "users": (
+            models.User,
+            [
+                models.User.id,
+                models.User.first_name,
+                models.User.last_name,
+                models.User.email,
+                models.User.phone_no,
+                models.User.role,
+                models.User.branch_id,
+            ],
+            models.User.branch_id.in_(
+                select(models.Branch.id).where(
+                    models.Branch.coffee_shop_id == coffee_shop_id
+                )
+            ),
+        ),
+    }
+    for entity, (model, columns, scope_filter) in entities.items():
+        if role in SYNC_ENTITY_ROLES[entity]:
+            changes[entity] = _find_changed_rows(
+                db=db,
+                model=model,
+                columns=columns,
+                scope_filter=scope_filter,
+                since=since,
+            )
+    return changes
@@ -1,35 +1,18 @@
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from src import schemas, models
 from src.utils.hashing import Hash
 from src.exceptions.exception import *
 from src.helpers import coffee_shop, branch
+from src.utils import catalog_versions
+from src.utils.integrity import unique_violation_error
+from src.utils.pagination import decode_cursor, encode_cursor
 from typing import Union
 from fastapi import status
 
-
-def _is_user_exist(
-    db: Session, email: str = None, phone_no: str = None, excluded_user_id: int = None
-) -> bool:
-    """
-    This helper function used to check if a user exists by email or phone
-    *Args:
-        email (str): The email to check.
-        phone_no (str) : The phone number of the user to check
-        db (Session): A database session.
-        excluded_user_id (int): The user id to exclude from the check.
-    *Returns:
-        bool: True if the user exists, False otherwise.
-    """
-    query = db.query(models.User)
-
-    if email:
-        query = query.filter(models.User.email == email)
-    if phone_no:
-        query = query.filter(models.User.phone_no == phone_no)
-    if excluded_user_id:
-        query = query.filter(models.User.id != excluded_user_id)
-
-    return query.first() is not None
+# the unique constraints of the user email and phone number
+USER_UNIQUE_CONSTRAINTS = ("user_email_key", "user_phone_no_key")
 
 
 def _create_user(
@@ -57,8 +40,7 @@ def _create_user(
         branch_id=branch_id,
     )
     db.add(created_user_instance)
-    db.commit()
-    db.refresh(created_user_instance)
+    db.flush()
     return created_user_instance
 
 
@@ -109,21 +91,89 @@ def find_user(
     return found_user
 
 
-def find_all_users(db: Session, coffee_shop_id: int = None) -> list[models.User]:
+def _find_user_with_coffee_shop_id(
+    db: Session, email: str
+) -> Optional[tuple[models.User, int]]:
     """
-    This helper function used to get all users in a specific coffee shop.
+    This helper function used to get a non-deleted user by email along with the
+    coffee shop id of his/her branch in a single query.
+    *Args:
+        db (Session): A database session.
+        email (str): The email of the user.
+    *Returns:
+        a (User, coffee_shop_id) tuple if the user exists, None otherwise.
+    """
+    query = (
+        db.query(models.User, models.Branch.coffee_shop_id)
+        .join(models.Branch, models.Branch.id == models.User.branch_id)
+        .filter(
+            models.User.email == email,
+            models.User.deleted == False,
+            models.Branch.deleted == False,
+        )
+    )
+    return query.first()
+
+
+def find_users_page(
+    db: Session,
+    coffee_shop_id: int,
+    size: int,
+    cursor: str = None,
+    role: models.UserRole = None,
+    branch_id: int = None,
+) -> dict:
+    """
+    This helper function used to get a page of the non-deleted users of a coffee
+    shop, optionally of a role or a branch. Only the columns of the response are
+    selected, the password hashes are never loaded. The pages use keyset
+    pagination by id on the (branch_id, id) and (branch_id, role, id) indexes
     *Args:
         db (Session): A database session.
         coffee_shop_id (int): The coffee shop id.
+        size (int): the maximum number of users of the page
+        cursor (str): the next_cursor of the previous page, None for the first page
+        role (UserRole): optional argument, to get the users of this role
+        branch_id (int): optional argument, to get the users of this branch
     *Returns:
-        list[User]: The list of all users.
+        a dict with the shape of schemas.PaginatedUserResponse
     """
-    query = db.query(models.User).filter(models.User.deleted == False)
-    if coffee_shop_id:
-        query = query.join(models.Branch).filter(
-            models.Branch.coffee_shop_id == coffee_shop_id
+    query = (
+        select(
+            models.User.id,
+            models.User.first_name,
+            models.User.last_name,
+            models.User.email,
+            models.User.phone_no,
+            models.User.role,
+            models.User.branch_id,
+        )
+        .where(
+            models.User.branch_id.in_(
+                select(models.Branch.id).where(
+                    models.Branch.coffee_shop_id == coffee_shop_id
+                )
+            ),
+            models.User.deleted == False,
         )
-    return query.all()
+        .order_by(models.User.id)
+        # one more user tells if there is a next page
+        .limit(size + 1)
+    )
+    if role:
+        query = query.where(models.User.role == role)
+    if branch_id:
+        query = query.where(models.User.branch_id == branch_id)
+    if cursor:
+        (after_id,) = decode_cursor(cursor, (int,))
+        query = query.where(models.User.id > after_id)
+
+    rows = [dict(row) for row in db.execute(query).mappings()]
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor((rows[-1]["id"],))
+    return {"page_size": size, "next_cursor": next_cursor, "users": rows}
 
 
 def update_user(
@@ -149,31 +199,23 @@ def update_user(
         update_data["password"] = Hash.bcrypt_hash(password=update_data["password"])
     for field, value in update_data.items():
         setattr(user_instance, field, value)
-    db.commit()
-    db.refresh(user_instance)
+    db.flush()
     return user_instance
 
 
 def _validate_user_on_create_update(
     admin_coffee_shop_id: int,
     branch_id: int,
-    user_email: str,
-    user_phone_no: str,
     db: Session,
-    updated_user_id: int = None,
 ) -> None:
     """
     This helper function will be used to apply validation logic on creation or
-    update, validation will include:
-        - validate that the admin's coffee shop has the branch that exists in
-        the request body
-        - validate the user's email uniqueness
-        - validate the user's phone number uniqueness
+    update, it validates that the admin's coffee shop has the branch that exists
+    in the request body. The email and phone number uniqueness is enforced by
+    the unique constraints when the user is written (see unique_violation_error)
     *Args:
         - admin_coffee_shop_id (int): The coffee shop id of the admin who create/update the user.
         - branch_id (int): The branch id that exists in the request body.
-        - user_email (str): The created/updated user email.
-        - user_phone_no(str): The created/updated user phone number.
         - db (Session): A database session.
     *Returns:
         raise Exceptions in case of violation, pass otherwise
@@ -186,18 +228,6 @@ def _validate_user_on_create_update(
         coffee_shop_id=admin_coffee_shop_id,
     )
 
-    if _is_user_exist(
-        email=user_email,
-        db=db,
-        excluded_user_id=updated_user_id,
-    ) or _is_user_exist(
-        phone_no=user_phone_no, db=db, excluded_user_id=updated_user_id
-    ):
-        raise ShopsAppException(
-            message="User with this email or phone number already exists",
-            status_code=status.HTTP_409_CONFLICT,  # conflict error
-        )
-
 
 def validate_and_create_user(
     request: schemas.UserPOSTRequestBody,
@@ -217,8 +247,6 @@ def validate_and_create_user(
     _validate_user_on_create_update(
         admin_coffee_shop_id=admin_coffee_shop_id,
         branch_id=request.branch_id,
-        user_email=request.email,
-        user_phone_no=request.phone_no,
         db=db,
     )
     # create the user
@@ -229,11 +257,18 @@ def validate_and_create_user(
         phone_no=request.phone_no,
         password=request.password,
     )
-    created_user = _create_user(
-        request=user_details,
-        role=request.role,
-        branch_id=request.branch_id,
-        db=db,
+    with unique_violation_error(
+        constraints=USER_UNIQUE_CONSTRAINTS,
+        message="User with this email or phone number already exists",
+    ):
+        created_user = _create_user(
+            request=user_details,
+            role=request.role,
+            branch_id=request.branch_id,
+            db=db,
+        )
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=admin_coffee_shop_id, catalog=catalog_versions.USERS
     )
 
     return schemas.UserResponse(
@@ -247,6 +282,136 @@ def validate_and_create_user(
     )
 
 
+def validate_and_create_users(
+    request: schemas.UsersBulkPOSTRequestBody,
+    db: Session,
+    admin_coffee_shop_id: int,
+) -> dict:
+    """
+    This helper function used to validate and create many users at once. The
+    branches, emails and phone numbers of all the users are checked with one
+    query each, the passwords are hashed in parallel and the valid users are
+    inserted with a single statement. The invalid users are reported with the
+    same reasons as a single creation, the other ones are created
+    *Args:
+        request (UsersBulkPOSTRequestBody): The details of the users to create
+        db (Session): A database session.
+        admin_coffee_shop_id (int): The coffee shop id of the admin who created the users.
+    *Returns:
+        a dict with the shape of schemas.UsersBulkPOSTResponse
+    """
+    users = request.users
+    errors = []
+
+    # hashed before the first query: the session only checks out a connection
+    # when it runs one, so none is held (idle in transaction) while hashing
+    hashed_passwords = Hash.bcrypt_hash_many(
+        passwords=[user.password for user in users]
+    )
+
+    # the branches of the admin coffee shop among the requested ones
+    found_branch_ids = set(
+        db.execute(
+            select(models.Branch.id).where(
+                models.Branch.id.in_({user.branch_id for user in users}),
+                models.Branch.coffee_shop_id == admin_coffee_shop_id,
+                models.Branch.deleted == False,
+            )
+        ).scalars()
+    )
+    # the emails and phone numbers already taken, deleted users included
+    taken_emails, taken_phone_numbers = set(), set()
+    for row in db.execute(
+        select(models.User.email, models.User.phone_no).where(
+            or_(
+                models.User.email.in_({user.email for user in users}),
+                models.User.phone_no.in_({user.phone_no for user in users}),
+            )
+        )
+    ):
+        taken_emails.add(row.email)
+        taken_phone_numbers.add(row.phone_no)
+
+    valid_users: list[tuple[int, schemas.UserPOSTRequestBody]] = []
+    for index, user in enumerate(users):
+        if user.branch_id not in found_branch_ids:
+            errors.append(
+                {
+                    "index": index,
+                    "reason": f"Branch with id={user.branch_id} does not exist",
+                }
+            )
+        elif user.email in taken_emails or user.phone_no in taken_phone_numbers:
+            errors.append(
+                {
+                    "index": index,
+                    "reason": "User with this email or phone number already exists",
+                }
+            )
+        else:
+            valid_users.append((index, user))
+            # the next users of the request can not reuse them
+            taken_emails.add(user.email)
+            taken_phone_numbers.add(user.phone_no)
+
+    created_users = {}
+    if valid_users:
+        query = (
+            insert(models.User)
+            .values(
+                [
+                    {
+                        "first_name": user.first_name,
+                        "last_name": user.last_name,
+                        "email": user.email,
+                        "phone_no": user.phone_no,
+                        "password": hashed_passwords[index],
+                        "role": user.role,
+                        "branch_id": user.branch_id,
+                    }
+                    for index, user in valid_users
+                ]
+            )
+            # a user created by a concurrent request is reported, not raised
+            .on_conflict_do_nothing()
+            .returning(
+                models.User.id,
+                models.User.first_name,
+                models.User.last_name,
+                models.User.email,
+                models.User.phone_no,
+                models.User.role,
+                models.User.branch_id,
+            )
+        )
+        created_users = {
+            row["email"]: dict(row) for row in db.execute(query).mappings()
+        }
+        for index, user in valid_users:
+            if user.email not in created_users:
+                errors.append(
+                    {
+                        "index": index,
+                        "reason": "User with this email or phone number already exists",
+                    }
+                )
+        if created_users:
+            catalog_versions.bump_version(
+                db=db,
+                coffee_shop_id=admin_coffee_shop_id,
+                catalog=catalog_versions.USERS,
+            )
+
+    return {
+        "created": [
+            created_users[user.email]
+            for _, user in valid_users
+            if user.email in created_users
+        ],
+        "errors": sorted(errors, key=lambda error: error["index"]),
+    }
+
+
 def full_update_user(
     request: schemas.UserPUTRequestBody,
     db: Session,
@@ -271,13 +436,17 @@ def full_update_user(
     _validate_user_on_create_update(
         admin_coffee_shop_id=admin_coffee_shop_id,
         branch_id=request.branch_id,
-        user_email=request.email,
-        user_phone_no=request.phone_no,
         db=db,
-        updated_user_id=user_id,
     )
     # update the user
-    updated_user = update_user(request=request, db=db, user_instance=user_instance)
+    with unique_violation_error(
+        constraints=USER_UNIQUE_CONSTRAINTS,
+        message="User with this email or phone number already exists",
+    ):
+        updated_user = update_user(request=request, db=db, user_instance=user_instance)
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=admin_coffee_shop_id, catalog=catalog_versions.USERS
+    )
 
     return schemas.UserResponse(
         id=updated_user.id,
@@ -318,22 +487,15 @@ def partial_update_user(
             coffee_shop_id=admin_coffee_shop_id,
         )
 
-    # verify email and phone uniqueness and exclude the user to be updated
-    # from the check
-    if request.phone_no:
-        if _is_user_exist(phone_no=request.phone_no, db=db, excluded_user_id=user_id):
-            raise ShopsAppException(
-                message="User with this email or phone already exists",
-                status_code=status.HTTP_409_CONFLICT,
-            )
-    if request.email:
-        if _is_user_exist(email=request.email, db=db, excluded_user_id=user_id):
-            raise ShopsAppException(
-                message="User with this email or phone already exists",
-                status_code=status.HTTP_409_CONFLICT,
-            )
-    # update the user
-    updated_user = update_user(request=request, db=db, user_instance=user_instance)
+    # update the user, the unique constraints verify the email and phone uniqueness
+    with unique_violation_error(
+        constraints=USER_UNIQUE_CONSTRAINTS,
+        message="User with this email or phone already exists",
+    ):
+        updated_user = update_user(request=request, db=db, user_instance=user_instance)
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=admin_coffee_shop_id, catalog=catalog_versions.USERS
+    )
 
     return schemas.UserResponse(
         id=updated_user.id,
@@ -358,8 +520,10 @@ def delete_user(user_id: int, db: Session, admin_coffee_shop_id: int) -> None:
         user_id=user_id, db=db, coffee_shop_id=admin_coffee_shop_id
     )
     user_instance.deleted = True
-    db.commit()
-    db.refresh(user_instance)
+    db.flush()
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=admin_coffee_shop_id, catalog=catalog_versions.USERS
+    )
 
 
 def _validate_user_on_restore(
@@ -441,8 +605,10 @@ def restore_user(
     )
     restored_user.deleted = False
     restored_user.branch_id = request.branch_id
-    db.commit()
-    db.refresh(restored_user)
+    db.flush()
+    catalog_versions.bump_version(
+        db=db, coffee_shop_id=admin_coffee_shop_id, catalog=catalog_versions.USERS
+    )
     return schemas.UserResponse(
         id=restored_user.id,
         first_name=restored_user.first_name,
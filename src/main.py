@@ -1,24 +1,60 @@
+from contextlib import asynccontextmanager
+import anyio.to_thread
 from fastapi import FastAPI
+from src.middlewares.admission import AdmissionControlMiddleware
+from src.middlewares.compression import CompressionMiddleware
+from src.middlewares.profiler import ProfilerMiddleware
+from src.middlewares.timing import TimingMiddleware
 from src.routers import (
     authentication,
     coffee_shop,
     customer,
     inventory_item,
     menu_item,
+    monitoring,
     order,
     report,
+    sync,
     user,
 )
+from src.settings import database
+from src.utils import catalog_versions, hashing, lanes, warm_up
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # size the shared thread pool so that every lane can use its full capacity
+    lanes.configure_thread_pool()
+    # open the database connections and run representative requests before the
+    # worker accepts traffic, the readiness probe reports the result
+    await warm_up.warm_up(app)
+    # keep the catalog versions of the in-process caches up to date
+    catalog_versions.start_listener()
+    yield
+    await anyio.to_thread.run_sync(catalog_versions.stop_listener)
+    await anyio.to_thread.run_sync(hashing.shutdown_process_pool)
+    await anyio.to_thread.run_sync(database.dispose_pools)
+
+
+app = FastAPI(lifespan=lifespan)
+
+# register middlewares, the last registered is the outermost
+app.add_middleware(ProfilerMiddleware)
+app.add_middleware(AdmissionControlMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(TimingMiddleware)
 
 # register routes
 app.include_router(authentication.router)
 app.include_router(coffee_shop.router)
+app.include_router(user.bulk_router)
 app.include_router(user.router)
+app.include_router(customer.search_router)
+app.include_router(customer.bulk_router)
 app.include_router(customer.router)
 app.include_router(inventory_item.router)
 app.include_router(menu_item.router)
 app.include_router(order.router)
 app.include_router(report.router)
+app.include_router(sync.router)
+app.include_router(monitoring.router)
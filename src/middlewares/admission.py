@@ -0,0 +1,135 @@
+import math
+from typing import Optional
+from fastapi import status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from src import schemas
+from src.security.jwt import verify_token
+from src.settings.settings import ADMISSION_SETTINGS
+from src.utils.request_timing import measure
+from src.utils.token_bucket import TokenBucket
+
+
+class _InvalidToken(Exception):
+    pass
+
+
+def get_traffic_class(method: str, path: str) -> str:
+    """
+    Classify a request into one of the admission traffic classes
+    *Args:
+        method (str): the HTTP method of the request
+        path (str): the path of the request
+    *Returns:
+        "reports" for report queries, "pos" for any write (mostly order
+        placement and status updates), "reads" otherwise
+    """
+    if path.startswith("/reports"):
+        return "reports"
+    if method not in ("GET", "HEAD", "OPTIONS"):
+        return "pos"
+    return "reads"
+
+
+def get_token_data(scope: Scope) -> Optional[schemas.TokenData]:
+    """
+    Decode and verify the bearer token of the request, the verified token data is
+    stored in the request state so that the auth dependency does not decode it again
+    *Args:
+        scope (Scope): the ASGI scope of the request
+    *Returns:
+        the token data if the request carries a valid token, None otherwise
+    """
+    state = scope.setdefault("state", {})
+    if "token_data" in state:
+        return state["token_data"]
+
+    token_data = None
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    with measure("auth"):
+                        token_data = verify_token(token, _InvalidToken())
+                except _InvalidToken:
+                    pass
+            break
+    state["token_data"] = token_data
+    return token_data
+
+
+class _TenantClassState:
+    """
+    Admission state of one coffee shop in one traffic class
+    """
+
+    def __init__(self, class_settings: dict):
+        self.max_concurrency = class_settings["MAX_CONCURRENCY"]
+        self.in_flight = 0
+        self.bucket = TokenBucket(
+            rate=class_settings["RATE_PER_SECOND"], capacity=class_settings["BURST"]
+        )
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware that enforces per coffee shop concurrency limits and
+    token-bucket rate limits for each traffic class, requests over the rate are
+    rejected with 429 and requests over the concurrency limit are shed with 503,
+    both with a Retry-After header.
+    Requests without a valid token are not limited here, they are rejected
+    by the auth dependency anyway.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._states: dict[tuple[int, str], _TenantClassState] = {}
+
+    def _get_state(self, coffee_shop_id: int, traffic_class: str) -> _TenantClassState:
+        key = (coffee_shop_id, traffic_class)
+        state = self._states.get(key)
+        if state is None:
+            state = _TenantClassState(ADMISSION_SETTINGS["CLASSES"][traffic_class])
+            self._states[key] = state
+        return state
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not ADMISSION_SETTINGS["ENABLED"]:
+            await self.app(scope, receive, send)
+            return
+
+        token_data = get_token_data(scope)
+        if token_data is None:
+            await self.app(scope, receive, send)
+            return
+
+        traffic_class = get_traffic_class(scope["method"], scope["path"])
+        state = self._get_state(token_data.coffee_shop_id, traffic_class)
+
+        if state.in_flight >= state.max_concurrency:
+            response = JSONResponse(
+                {"detail": "Too many concurrent requests, please retry later"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={
+                    "Retry-After": str(ADMISSION_SETTINGS["OVERLOAD_RETRY_AFTER"])
+                },
+            )
+            await response(scope, receive, send)
+            return
+
+        wait_time = state.bucket.try_acquire()
+        if wait_time:
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded, please retry later"},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(math.ceil(wait_time))},
+            )
+            await response(scope, receive, send)
+            return
+
+        state.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            state.in_flight -= 1
@@ -0,0 +1,247 @@
+import gzip
+import zlib
+from typing import Callable, Optional
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.settings.settings import COMPRESSION_SETTINGS
+
+# brotli and zstandard are optional, their encodings are offered when installed
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+
+def no_compression(endpoint: Callable) -> Callable:
+    """
+    Decorator that opts a route endpoint out of response compression, it must be
+    applied below the route decorator
+    """
+    endpoint.compression = False
+    return endpoint
+
+
+class _GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(
+            COMPRESSION_SETTINGS["GZIP_LEVEL"], zlib.DEFLATED, 31
+        )
+
+    def compress(self, chunk: bytes) -> bytes:
+        # flush every chunk so that the client receives the streamed data as it comes
+        return self._compressor.compress(chunk) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(
+            quality=COMPRESSION_SETTINGS["BROTLI_QUALITY"]
+        )
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(
+            level=COMPRESSION_SETTINGS["ZSTD_LEVEL"]
+        ).compressobj()
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _compress_gzip(body: bytes) -> bytes:
+    return gzip.compress(
+        body, compresslevel=COMPRESSION_SETTINGS["GZIP_LEVEL"], mtime=0
+    )
+
+
+def _compress_brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=COMPRESSION_SETTINGS["BROTLI_QUALITY"])
+
+
+def _compress_zstd(body: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=COMPRESSION_SETTINGS["ZSTD_LEVEL"]).compress(
+        body
+    )
+
+
+# supported encodings in order of preference: (one-shot function, stream class)
+ENCODINGS: dict[str, tuple[Callable[[bytes], bytes], type]] = {}
+if brotli is not None:
+    ENCODINGS["br"] = (_compress_brotli, _BrotliStream)
+if zstandard is not None:
+    ENCODINGS["zstd"] = (_compress_zstd, _ZstdStream)
+ENCODINGS["gzip"] = (_compress_gzip, _GzipStream)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the preferred supported encoding accepted by the client
+    *Args:
+        accept_encoding (str): the Accept-Encoding header of the request
+    *Returns:
+        the name of the encoding, None if the client accepts none of them
+    """
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, parameters = part.strip().partition(";")
+        quality = 1.0
+        parameter, _, value = parameters.strip().partition("=")
+        if parameter.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    best_encoding, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best_encoding, best_quality = encoding, quality
+    return best_encoding
+
+
+def _is_compressible(headers: MutableHeaders) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return (
+        content_type.startswith("text/")
+        or content_type.endswith("+json")
+        or content_type in COMPRESSIBLE_CONTENT_TYPES
+    )
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses the responses with the best encoding accepted
+    by the client (brotli or zstd when installed, gzip otherwise).
+    Bodies smaller than the minimum size are sent as they are, big bodies are
+    compressed in a worker thread so the event loop is not blocked, and streamed
+    responses are compressed chunk by chunk. Routes can opt out with the
+    no_compression decorator.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not COMPRESSION_SETTINGS["ENABLED"]:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        compress, stream_class = ENCODINGS[encoding]
+        start_message: Optional[Message] = None
+        stream = None
+        passthrough = False
+
+        def set_encoding_headers(headers: MutableHeaders) -> None:
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            # the compressed body is a different representation of the resource
+            etag = headers.get("etag")
+            if etag and etag.endswith('"') and not etag.startswith("W/"):
+                headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, stream, passthrough
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                route = scope.get("route")
+                if (
+                    not _is_compressible(headers)
+                    or message["status"] in (204, 304)
+                    or (
+                        route is not None
+                        and not getattr(route.endpoint, "compression", True)
+                    )
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                # wait for the first body message to know the size of the body
+                start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None and not more_body:
+                # the whole body is in one message
+                headers = MutableHeaders(scope=start_message)
+                if len(body) < COMPRESSION_SETTINGS["MINIMUM_SIZE"]:
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+                if len(body) >= COMPRESSION_SETTINGS["OFFLOAD_SIZE"]:
+                    body = await anyio.to_thread.run_sync(compress, body)
+                else:
+                    body = compress(body)
+                set_encoding_headers(headers)
+                headers["Content-Length"] = str(len(body))
+                await send(start_message)
+                start_message = None
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            if start_message is not None:
+                # streamed response, compressed chunk by chunk
+                headers = MutableHeaders(scope=start_message)
+                set_encoding_headers(headers)
+                del headers["Content-Length"]
+                await send(start_message)
+                start_message = None
+                stream = stream_class()
+
+            compressed = stream.compress(body) if body else b""
+            if not more_body:
+                compressed += stream.finish()
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": compressed,
+                    "more_body": more_body,
+                }
+            )
+
+        await self.app(scope, receive, send_compressed)
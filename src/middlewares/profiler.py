@@ -0,0 +1,89 @@
+from urllib.parse import parse_qs
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.middlewares.admission import get_token_data
+from src.models.user import UserRole
+from src.settings.settings import PROFILER_SETTINGS
+from src.utils.profiler import current_profile, try_start_profile
+
+
+def is_profile_requested(scope: Scope) -> bool:
+    """
+    Check if the request asks to be profiled, either with the X-Profile header
+    or with the profile query parameter
+    """
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value.lower() in (b"1", b"true")
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return query.get("profile", [""])[-1].lower() in ("1", "true")
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware that profiles the requests of admins that ask for it, the SQL
+    statements and the call tree of the endpoint are recorded and the response is
+    replaced by the plain text report of the profile. The report is sent back with
+    the request instead of being kept, so it does not matter which worker process
+    answers. The status of the replaced response is in the report.
+    Profiling is rate limited, over the rate the request runs normally and the
+    X-Profile-Status header is set to "rate-limited".
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not PROFILER_SETTINGS["ENABLED"]
+            or not is_profile_requested(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        token_data = get_token_data(scope)
+        if token_data is None or token_data.role != UserRole.ADMIN:
+            await self.app(scope, receive, send)
+            return
+
+        profile = try_start_profile(
+            method=scope["method"],
+            path=scope["path"],
+            coffee_shop_id=token_data.coffee_shop_id,
+        )
+
+        if profile is None:
+
+            async def send_with_rate_limited_header(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-Profile-Status", "rate-limited")
+                await send(message)
+
+            await self.app(scope, receive, send_with_rate_limited_header)
+            return
+
+        async def discard_response(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.response_status = message["status"]
+
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, discard_response)
+        finally:
+            current_profile.reset(token)
+
+        report = profile.report().encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(report)).encode()),
+                    (b"x-profile-id", profile.id.encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": report})
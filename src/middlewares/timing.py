@@ -0,0 +1,46 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.utils.metrics import REQUEST_DB_STATEMENTS, REQUEST_DURATION
+from src.utils.request_timing import RequestTimings, current_timings
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware that collects the timings of each request, returns them in a
+    Server-Timing header and records the request latency and number of SQL
+    statements per route
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        status_code = 500
+
+        async def send_with_server_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.server_timing_header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            current_timings.reset(token)
+            route = scope.get("route")
+            route_path = route.path if route else "unmatched"
+            REQUEST_DURATION.observe(
+                timings.elapsed(),
+                method=scope["method"],
+                route=route_path,
+                status=status_code,
+            )
+            REQUEST_DB_STATEMENTS.observe(timings.db_statements, route=route_path)
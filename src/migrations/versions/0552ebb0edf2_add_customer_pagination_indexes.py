@@ -0,0 +1,37 @@
+"""add customer pagination indexes
+
+Revision ID: 0552ebb0edf2
+Revises: c7d5d206b852
+Create Date: 2026-10-19 14:41:08.316274
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0552ebb0edf2"
+down_revision: Union[str, None] = "c7d5d206b852"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # a page starts right after the key of the previous one in the index of the
+    # shop, whatever the page number
+    op.create_index(
+        "ix_customer_coffee_shop_id_id", "customer", ["coffee_shop_id", "id"]
+    )
+    op.create_index(
+        "ix_customer_coffee_shop_id_created_id",
+        "customer",
+        ["coffee_shop_id", "created", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_customer_coffee_shop_id_created_id", table_name="customer")
+    op.drop_index("ix_customer_coffee_shop_id_id", table_name="customer")
@@ -0,0 +1,38 @@
+"""add catalog version table
+
+Revision ID: 09722a015849
+Revises: dab05b4a193b
+Create Date: 2026-10-19 10:12:31.402117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "09722a015849"
+down_revision: Union[str, None] = "dab05b4a193b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the version of each catalog of a coffee shop, used to invalidate the caches
+    op.create_table(
+        "catalog_version",
+        sa.Column("coffee_shop_id", sa.Integer, nullable=False),
+        sa.Column("catalog", sa.String(255), nullable=False),
+        sa.Column("version", sa.BigInteger, nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(
+            ["coffee_shop_id"], ["coffee_shop.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("coffee_shop_id", "catalog"),
+    )
+
+
+def downgrade() -> None:
+    # drop the catalog_version table
+    op.drop_table("catalog_version")
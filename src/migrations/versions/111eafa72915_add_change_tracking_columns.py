@@ -0,0 +1,75 @@
+"""add change tracking columns
+
+Revision ID: 111eafa72915
+Revises: 09722a015849
+Create Date: 2026-10-19 11:03:54.218736
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "111eafa72915"
+down_revision: Union[str, None] = "09722a015849"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# the tracked tables with the column their sync query is scoped by
+TRACKED_TABLES = (
+    ("menu_item", "coffee_shop_id"),
+    ("inventory_item", "coffee_shop_id"),
+    ("customer", "coffee_shop_id"),
+    ("branch", "coffee_shop_id"),
+    ("user", "branch_id"),
+)
+
+
+def upgrade() -> None:
+    # every insert and update stamps the row with the time and the id of the
+    # writing transaction, whatever the statement that wrote it (ORM, upsert, COPY)
+    op.execute(
+        """
+        CREATE FUNCTION set_change_seq() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := pg_current_xact_id()::text::bigint;
+            NEW.updated_at := now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table, scope_column in TRACKED_TABLES:
+        # the existing rows are all part of the first sync (since=0)
+        op.add_column(
+            table,
+            sa.Column(
+                "updated_at",
+                sa.TIMESTAMP(),
+                nullable=False,
+                server_default=sa.func.now(),
+            ),
+        )
+        op.add_column(
+            table,
+            sa.Column("change_seq", sa.BigInteger, nullable=False, server_default="0"),
+        )
+        op.create_index(
+            f"ix_{table}_{scope_column}_change_seq", table, [scope_column, "change_seq"]
+        )
+        op.execute(
+            f'CREATE TRIGGER {table}_set_change_seq BEFORE INSERT OR UPDATE ON "{table}"'
+            " FOR EACH ROW EXECUTE FUNCTION set_change_seq()"
+        )
+
+
+def downgrade() -> None:
+    for table, scope_column in TRACKED_TABLES:
+        op.execute(f'DROP TRIGGER {table}_set_change_seq ON "{table}"')
+        op.drop_index(f"ix_{table}_{scope_column}_change_seq", table_name=table)
+        op.drop_column(table, "change_seq")
+        op.drop_column(table, "updated_at")
+    op.execute("DROP FUNCTION set_change_seq()")
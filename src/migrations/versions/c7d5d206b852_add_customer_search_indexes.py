@@ -0,0 +1,47 @@
+"""add customer search indexes
+
+Revision ID: c7d5d206b852
+Revises: 111eafa72915
+Create Date: 2026-10-19 11:47:20.530918
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7d5d206b852"
+down_revision: Union[str, None] = "111eafa72915"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # pg_trgm indexes the trigrams of the texts, btree_gist and btree_gin let the
+    # indexes start with the coffee shop id so a search only reads its shop
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    # fuzzy search by name, the GiST index returns the nearest names first
+    # (ORDER BY name <->> :search LIMIT n) without sorting all the matches
+    op.create_index(
+        "ix_customer_coffee_shop_id_name_trgm",
+        "customer",
+        ["coffee_shop_id", sa.text("name gist_trgm_ops")],
+        postgresql_using="gist",
+    )
+    # partial search by phone number, anywhere in the number
+    op.create_index(
+        "ix_customer_coffee_shop_id_phone_no_trgm",
+        "customer",
+        ["coffee_shop_id", sa.text("phone_no gin_trgm_ops")],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_customer_coffee_shop_id_phone_no_trgm", table_name="customer")
+    op.drop_index("ix_customer_coffee_shop_id_name_trgm", table_name="customer")
@@ -0,0 +1,41 @@
+"""add user listing indexes
+
+Revision ID: f7cdcb2671df
+Revises: 0552ebb0edf2
+Create Date: 2026-10-19 15:32:47.905163
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f7cdcb2671df"
+down_revision: Union[str, None] = "0552ebb0edf2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the pages of the non-deleted users of the branches, by id, optionally of a
+    # role. Partial indexes, the deleted users are never listed
+    op.create_index(
+        "ix_user_branch_id_id",
+        "user",
+        ["branch_id", "id"],
+        postgresql_where=sa.text("deleted = false"),
+    )
+    op.create_index(
+        "ix_user_branch_id_role_id",
+        "user",
+        ["branch_id", "role", "id"],
+        postgresql_where=sa.text("deleted = false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_branch_id_role_id", table_name="user")
+    op.drop_index("ix_user_branch_id_id", table_name="user")
@@ -1,4 +1,5 @@
 from src.models.branch import *
+from src.models.catalog_version import *
 from src.models.coffee_shop import *
 from src.models.customer import *
 from src.models.inventory_item import *
@@ -1,5 +1,15 @@
 from src.settings.database import Base
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import (
+    Column,
+    Integer,
+    BigInteger,
+    String,
+    Boolean,
+    ForeignKey,
+    TIMESTAMP,
+    FetchedValue,
+    Index,
+)
 
 
 class Branch(Base):
@@ -15,3 +25,21 @@ class Branch(Base):
     deleted = Column(Boolean, default=False)
     # relationship with coffee shops
     coffee_shop_id = Column(Integer, ForeignKey("coffee_shop.id"))
+    # maintained by the set_change_seq trigger on every insert and update, the
+    # change sequence is the id of the writing transaction (used by the sync)
+    updated_at = Column(
+        TIMESTAMP,
+        nullable=False,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
+    change_seq = Column(
+        BigInteger,
+        nullable=False,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
+
+    __table_args__ = (
+        Index("ix_branch_coffee_shop_id_change_seq", "coffee_shop_id", "change_seq"),
+    )
@@ -0,0 +1,17 @@
+from src.settings.database import Base
+from sqlalchemy import Column, Integer, String, BigInteger, ForeignKey
+
+
+class CatalogVersion(Base):
+    """
+    SQLAlchemy model for CatalogVersion table, the version of a catalog (menu,
+    ...) of a coffee shop, it is incremented on every change of the catalog
+    """
+
+    __tablename__ = "catalog_version"
+
+    coffee_shop_id = Column(
+        Integer, ForeignKey("coffee_shop.id", ondelete="CASCADE"), primary_key=True
+    )
+    catalog = Column(String(255), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -9,6 +9,9 @@ from sqlalchemy import (
     TIMESTAMP,
     ForeignKey,
     UniqueConstraint,
+    BigInteger,
+    FetchedValue,
+    Index,
 )
 
 
@@ -24,10 +27,45 @@ class Customer(Base):
     phone_no = Column(String, nullable=False)
     coffee_shop_id = Column(Integer, ForeignKey("coffee_shop.id"))
     created = Column(TIMESTAMP, nullable=False, default=datetime.now)
+    # maintained by the set_change_seq trigger on every insert and update, the
+    # change sequence is the id of the writing transaction (used by the sync)
+    updated_at = Column(
+        TIMESTAMP,
+        nullable=False,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
+    change_seq = Column(
+        BigInteger,
+        nullable=False,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
     # relationship with order
     orders = relationship("Order", back_populates="customer")
 
     # adding uniqueness constraint for phone and coffee_shop
     __table_args__ = (
         UniqueConstraint("phone_no", "coffee_shop_id", name="unique_phone_shop"),
+        Index("ix_customer_coffee_shop_id_change_seq", "coffee_shop_id", "change_seq"),
+        # keyset pagination of the customers of a shop, by id or by creation time
+        Index("ix_customer_coffee_shop_id_id", "coffee_shop_id", "id"),
+        Index(
+            "ix_customer_coffee_shop_id_created_id", "coffee_shop_id", "created", "id"
+        ),
+        # trigram indexes of the customer search
+        Index(
+            "ix_customer_coffee_shop_id_name_trgm",
+            "coffee_shop_id",
+            "name",
+            postgresql_using="gist",
+            postgresql_ops={"name": "gist_trgm_ops"},
+        ),
+        Index(
+            "ix_customer_coffee_shop_id_phone_no_trgm",
+            "coffee_shop_id",
+            "phone_no",
+            postgresql_using="gin",
+            postgresql_ops={"phone_no": "gin_trgm_ops"},
+        ),
     )
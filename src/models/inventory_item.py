@@ -7,6 +7,10 @@ from sqlalchemy import (
     DOUBLE_PRECISION,
     Boolean,
     DATE,
+    BigInteger,
+    TIMESTAMP,
+    FetchedValue,
+    Index,
 )
 
 
@@ -26,3 +30,25 @@ class InventoryItem(Base):
     deleted = Column(Boolean, default=False)
     # relationship with Coffee Shop
     coffee_shop_id = Column(Integer, ForeignKey("coffee_shop.id"))
+    # maintained by the set_change_seq trigger on every insert and update, the
+    # change sequence is the id of the writing transaction (used by the sync)
+    updated_at = Column(
+        TIMESTAMP,
+        nullable=False,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
+    change_seq = Column(
+        BigInteger,
+        nullable=False,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_inventory_item_coffee_shop_id_change_seq",
+            "coffee_shop_id",
+            "change_seq",
+        ),
+    )
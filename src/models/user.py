@@ -6,6 +6,11 @@ from sqlalchemy import (
     Boolean,
     Enum as SQLAlchemyEnum,
     ForeignKey,
+    BigInteger,
+    TIMESTAMP,
+    FetchedValue,
+    Index,
+    text,
 )
 from enum import Enum
 
@@ -39,3 +44,35 @@ class User(Base):
     role = Column(SQLAlchemyEnum(UserRole), nullable=False)
     # relationship with branch (belongs to)
     branch_id = Column(Integer, ForeignKey("branch.id"))
+    # maintained by the set_change_seq trigger on every insert and update, the
+    # change sequence is the id of the writing transaction (used by the sync)
+    updated_at = Column(
+        TIMESTAMP,
+        nullable=False,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
+    change_seq = Column(
+        BigInteger,
+        nullable=False,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
+
+    __table_args__ = (
+        Index("ix_user_branch_id_change_seq", "branch_id", "change_seq"),
+        # keyset pagination of the staff directory, by branch and by role
+        Index(
+            "ix_user_branch_id_id",
+            "branch_id",
+            "id",
+            postgresql_where=text("deleted = false"),
+        ),
+        Index(
+            "ix_user_branch_id_role_id",
+            "branch_id",
+            "role",
+            "id",
+            postgresql_where=text("deleted = false"),
+        ),
+    )
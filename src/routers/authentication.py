@@ -5,9 +5,11 @@ from src.settings.database import get_db
 from src.helpers import authentication
 from src.exceptions.exception import *
 from sqlalchemy.orm import Session
+from src.utils.lanes import lane_route
 
 router = APIRouter(
     tags=["Authentication"],
+    route_class=lane_route("admin"),
 )
 
 
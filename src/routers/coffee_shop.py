@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
 from src import schemas, models
 from src.security.oauth2 import require_role
@@ -6,10 +6,13 @@ from src.settings.database import get_db
 from src.helpers import coffee_shop, branch
 from src.exceptions.exception import *
 from src.utils.control_access import check_if_user_can_access_shop
+from src.utils import catalog_versions, etag
+from src.utils.lanes import lane_route
 
 router = APIRouter(
     tags=["Coffee Shops"],
     prefix="/coffee-shops",
+    route_class=lane_route("admin"),
 )
 
 
@@ -129,17 +132,27 @@ def delete_branch_endpoint(
 @router.get("/{coffee_shop_id}/branches", response_model=list[schemas.BranchResponse])
 def get_all_branches_endpoint(
     coffee_shop_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: schemas.TokenData = Depends(require_role([models.UserRole.ADMIN])),
 ):
     """
-    GET endpoint to retrieve all branches for a specific coffee shop
+    GET endpoint to retrieve all branches for a specific coffee shop, it supports
+    If-None-Match
     """
     try:
         check_if_user_can_access_shop(
             user_coffee_shop_id=current_user.coffee_shop_id,
             target_coffee_shop_id=coffee_shop_id,
         )
+        branches_etag = etag.catalog_etag(
+            db=db, coffee_shop_id=coffee_shop_id, catalog=catalog_versions.BRANCHES
+        )
+        not_modified = etag.not_modified_response(request=request, etag=branches_etag)
+        if not_modified:
+            return not_modified
+        etag.set_etag(response, branches_etag)
         return branch.find_all_branches(coffee_shop_id=coffee_shop_id, db=db)
     except ShopsAppException as se:
         raise HTTPException(status_code=se.status_code, detail=se.message)
@@ -1,18 +1,127 @@
-from fastapi import APIRouter, Depends, Response, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    Query,
+    Response,
+    HTTPException,
+    UploadFile,
+    status,
+)
 from src import schemas
 from sqlalchemy.orm import Session
-from src.settings.database import get_db
+from fastapi.responses import StreamingResponse
+from src.settings.database import engines, get_db
 from src.security.oauth2 import require_role
 from src.models.user import UserRole
 from src.helpers import customer
 from src.exceptions.exception import ShopsAppException
+from src.settings.settings import RESPONSE_SETTINGS
+from src.utils.fast_json import FastJSONResponse
+from src.utils.lanes import current_lane, lane_route, stream_in_lane
+from src.utils.statement_budget import no_statement_budget
 
 router = APIRouter(
     tags=["Customers"],
     prefix="/customers",
+    route_class=lane_route("admin"),
+)
+
+# the type-ahead search is used while taking orders, it runs in the POS lane.
+# The search and bulk routers are registered before the router so that /search
+# and /export are not taken for a customer id
+search_router = APIRouter(
+    tags=["Customers"],
+    prefix="/customers",
+    route_class=lane_route("pos"),
+)
+
+# the export and the import hold a database connection for long, they use the
+# pool of the reports lane so they do not starve the admin requests
+bulk_router = APIRouter(
+    tags=["Customers"],
+    prefix="/customers",
+    route_class=lane_route("reports"),
 )
 
 
+@search_router.get("/search", response_model=list[schemas.CustomerResponse])
+def search_customers_endpoint(
+    q: str = Query(..., min_length=3, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: schemas.TokenData = Depends(
+        require_role([UserRole.ADMIN, UserRole.CASHIER, UserRole.ORDER_RECEIVER])
+    ),
+):
+    """
+    GET endpoint to search the customers by a part of their phone number or name
+    """
+    try:
+        return customer.search_customers(
+            db=db,
+            coffee_shop_id=current_user.coffee_shop_id,
+            search=q,
+            limit=limit,
+        )
+    except ShopsAppException as se:
+        raise HTTPException(status_code=se.status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@bulk_router.get("/export", response_class=StreamingResponse)
+def export_customers_endpoint(
+    current_user: schemas.TokenData = Depends(require_role([UserRole.ADMIN])),
+):
+    """
+    GET endpoint to export all the customers as NDJSON, one customer per line, the
+    stream holds a slot of the lane until the last customer is sent
+    """
+    try:
+        lane = current_lane.get()
+        return StreamingResponse(
+            stream_in_lane(
+                customer.export_customers(
+                    bind=engines[lane], coffee_shop_id=current_user.coffee_shop_id
+                ),
+                lane=lane,
+            ),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="customers.ndjson"'},
+        )
+    except ShopsAppException as se:
+        raise HTTPException(status_code=se.status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@bulk_router.post("/import", response_model=schemas.CustomerImportResponse)
+@no_statement_budget
+def import_customers_endpoint(
+    file: UploadFile,
+    db: Session = Depends(get_db),
+    current_user: schemas.TokenData = Depends(require_role([UserRole.ADMIN])),
+):
+    """
+    POST endpoint to import the customers of a CSV file with name and phone_no
+    columns, the existing customers (same phone number) get the name of the file
+    """
+    try:
+        return customer.import_customers(
+            file=file.file, db=db, coffee_shop_id=current_user.coffee_shop_id
+        )
+    except ShopsAppException as se:
+        raise HTTPException(status_code=se.status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
 @router.put("/{customer_id}", response_model=schemas.CustomerResponse)
 def update_customer_endpoint(
     customer_id: int,
@@ -40,23 +149,33 @@ def update_customer_endpoint(
         )
 
 
-@router.get("/", response_model=list[schemas.CustomerResponse])
+@router.get("/", response_model=schemas.PaginatedCustomerResponse)
 def get_all_customers_details_endpoint(
     phone_no: str = None,
     name: str = None,
+    size: int = Query(100, ge=1, le=1000),
+    sort_by: str = Query("id", pattern="^(id|created)$"),
+    cursor: str = None,
     db: Session = Depends(get_db),
     current_user: schemas.TokenData = Depends(require_role([UserRole.ADMIN])),
 ):
     """
-    GET endpoint to get all customers
+    GET endpoint to get the customers page by page, the next_cursor of a page
+    is sent as the cursor of the next one
     """
     try:
-        return customer.find_all_customers(
+        customers_page = customer.find_customers_page(
             db=db,
             coffee_shop_id=current_user.coffee_shop_id,
+            size=size,
+            sort_by=sort_by,
+            cursor=cursor,
             customer_phone_no=phone_no,
             customer_name=name,
         )
+        if RESPONSE_SETTINGS["FAST_JSON"]:
+            return FastJSONResponse(customers_page)
+        return customers_page
     except ShopsAppException as se:
         raise HTTPException(status_code=se.status_code, detail=se.message)
     except Exception as e:
@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Response, Depends, status, HTTPException
+from fastapi import APIRouter, Request, Response, Depends, status, HTTPException
 from src import schemas, models
 from src.settings.database import get_db
 from src.security.oauth2 import require_role
 from src.helpers import inventory_item, coffee_shop
 from src.exceptions.exception import *
 from sqlalchemy.orm import Session
+from src.utils import catalog_versions, etag
+from src.utils.lanes import lane_route
 
 router = APIRouter(
     tags=["Inventory Items"],
     prefix="/inventory-items",
+    route_class=lane_route("admin"),
 )
 
 
@@ -38,13 +41,24 @@ def create_inventory_item_endpoint(
 
 @router.get("/", response_model=list[schemas.InventoryItemResponse])
 def get_all_inventory_items_endpoint(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: schemas.TokenData = Depends(require_role([models.UserRole.ADMIN])),
 ):
     """
-    GET endpoint to get all inventory items in the shop
+    GET endpoint to get all inventory items in the shop, it supports If-None-Match
     """
     try:
+        inventory_etag = etag.catalog_etag(
+            db=db,
+            coffee_shop_id=current_user.coffee_shop_id,
+            catalog=catalog_versions.INVENTORY,
+        )
+        not_modified = etag.not_modified_response(request=request, etag=inventory_etag)
+        if not_modified:
+            return not_modified
+        etag.set_etag(response, inventory_etag)
         return inventory_item.find_all_inventory_items(
             db=db, coffee_shop_id=current_user.coffee_shop_id
         )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Response, Depends, status, HTTPException
+from fastapi import APIRouter, Request, Response, Depends, status, HTTPException
 from src import schemas, models
 from src.models.user import UserRole
 from src.settings.database import get_db
@@ -6,10 +6,15 @@ from src.security.oauth2 import require_role
 from src.helpers import menu_item, coffee_shop
 from src.exceptions.exception import *
 from sqlalchemy.orm import Session
+from src.settings.settings import RESPONSE_SETTINGS
+from src.utils import catalog_versions, etag
+from src.utils.fast_json import FastJSONResponse
+from src.utils.lanes import lane_route
 
 router = APIRouter(
     tags=["Menu Items"],
     prefix="/menu-items",
+    route_class=lane_route("pos"),
 )
 
 
@@ -39,6 +44,8 @@ def create_menu_item_endpoint(
 
 @router.get("/", response_model=list[schemas.MenuItemResponse])
 def get_all_menu_items_endpoint(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: schemas.TokenData = Depends(
         require_role(
@@ -47,12 +54,22 @@ def get_all_menu_items_endpoint(
     ),
 ):
     """
-    GET endpoint to get all menu items in the shop
+    GET endpoint to get all menu items in the shop, it supports If-None-Match
     """
     try:
-        return menu_item.find_all_menu_items(
-            db=db, coffee_shop_id=current_user.coffee_shop_id
+        menu_etag = etag.catalog_etag(
+            db=db,
+            coffee_shop_id=current_user.coffee_shop_id,
+            catalog=catalog_versions.MENU,
         )
+        not_modified = etag.not_modified_response(request=request, etag=menu_etag)
+        if not_modified:
+            return not_modified
+        menu = menu_item.find_menu(db=db, coffee_shop_id=current_user.coffee_shop_id)
+        if RESPONSE_SETTINGS["FAST_JSON"]:
+            return etag.set_etag(FastJSONResponse(list(menu.values())), menu_etag)
+        etag.set_etag(response, menu_etag)
+        return list(menu.values())
     except ShopsAppException as se:
         raise HTTPException(status_code=se.status_code, detail=se.message)
     except Exception as e:
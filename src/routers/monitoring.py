@@ -0,0 +1,77 @@
+import anyio.to_thread
+from fastapi import APIRouter, Depends, Response, status
+from fastapi.responses import PlainTextResponse
+from src import schemas
+from src.models.user import UserRole
+from src.security.oauth2 import require_metrics_token, require_role
+from src.settings.database import is_database_available
+from src.utils.lanes import get_lanes_statistics
+from src.utils.metrics import DB_TIMEOUTS, generate_metrics_text
+from src.utils.warm_up import is_warmed_up, warm_up_checks
+
+router = APIRouter(
+    tags=["Monitoring"],
+)
+
+
+@router.get(
+    "/monitoring/lanes",
+    response_model=list[schemas.LaneStatistics],
+    dependencies=[Depends(require_role([UserRole.ADMIN]))],
+)
+async def get_lanes_statistics_endpoint():
+    """
+    GET endpoint to get the capacity, usage, queue depth and number of database
+    timeouts of every execution lane, only admins can get them
+    """
+    return [
+        schemas.LaneStatistics(
+            **lane_statistics,
+            statement_timeouts=DB_TIMEOUTS.value(
+                lane=lane_statistics["lane"], kind="statement"
+            ),
+            lock_timeouts=DB_TIMEOUTS.value(lane=lane_statistics["lane"], kind="lock"),
+        )
+        for lane_statistics in get_lanes_statistics()
+    ]
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_metrics_token)],
+)
+async def get_metrics_endpoint():
+    """
+    GET endpoint to get the application metrics in the Prometheus text format,
+    only the scrapers sending the METRICS_TOKEN as a bearer token can get them
+    """
+    return PlainTextResponse(
+        generate_metrics_text(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@router.get("/health/live", response_model=schemas.HealthStatus)
+async def liveness_probe_endpoint():
+    """
+    GET endpoint for the liveness probe, the worker is alive if it answers
+    """
+    return schemas.HealthStatus(status="alive")
+
+
+@router.get("/health/ready", response_model=schemas.HealthStatus)
+async def readiness_probe_endpoint(response: Response):
+    """
+    GET endpoint for the readiness probe, the worker is ready once it is warmed up
+    and while the database answers, it answers 503 otherwise
+    """
+    checks = {
+        "warmed_up": is_warmed_up(),
+        "database": await anyio.to_thread.run_sync(is_database_available),
+        **{f"warm_up_{step}": result for step, result in warm_up_checks.items()},
+    }
+    ready = checks["warmed_up"] and checks["database"]
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return schemas.HealthStatus(status="ready" if ready else "not ready", checks=checks)
@@ -8,14 +8,22 @@ from src.exceptions.exception import ShopsAppException
 from src.security.oauth2 import require_role
 from src.helpers import order
 from src.models.order import OrderStatus
+from src.settings.settings import RESPONSE_SETTINGS
+from src.utils.fast_json import FastJSONResponse
+from src.utils.lanes import lane_route
+from src.utils.statement_budget import statement_budget
 
 router = APIRouter(
     tags=["Orders"],
     prefix="/orders",
+    route_class=lane_route("pos"),
 )
 
 
+# the menu version (and the menu on a cache miss), the customer upsert (and its
+# re-read after a concurrent insert), the order and its items
 @router.post("", response_model=schemas.OrderPOSTResponse)
+@statement_budget(6)
 def place_an_order_endpoint(
     request: schemas.OrderPOSTRequestBody,
     response: Response,
@@ -57,6 +65,16 @@ def get_all_orders_details_endpoint(
     GET endpoint to get all orders
     """
     try:
+        if RESPONSE_SETTINGS["FAST_JSON"]:
+            return FastJSONResponse(
+                order.get_all_orders_details_rows(
+                    status=order_status,
+                    db=db,
+                    coffee_shop_id=current_user.coffee_shop_id,
+                    page=page,
+                    size=size,
+                )
+            )
         return order.get_all_orders_details(
             status=order_status,
             db=db,
@@ -8,8 +8,13 @@ from src.exceptions.exception import ShopsAppException
 from src.utils.control_access import check_if_user_can_access_shop
 from src.helpers import report
 from datetime import date
+from src.utils.lanes import lane_route
 
-router = APIRouter(tags=["Reports"], prefix="/reports")
+router = APIRouter(
+    tags=["Reports"],
+    prefix="/reports",
+    route_class=lane_route("reports"),
+)
 
 
 @router.get(
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from src import schemas
+from src.models.user import UserRole
+from src.helpers import sync
+from src.settings.database import get_db
+from src.security.oauth2 import require_role
+from src.exceptions.exception import *
+from src.utils.lanes import lane_route
+
+router = APIRouter(
+    tags=["Sync"],
+    prefix="/sync",
+    route_class=lane_route("admin"),
+)
+
+
+@router.get("", response_model=schemas.SyncResponse, response_model_exclude_none=True)
+def sync_endpoint(
+    since: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: schemas.TokenData = Depends(
+        require_role(
+            [UserRole.ADMIN, UserRole.ORDER_RECEIVER, UserRole.CASHIER, UserRole.CHEF]
+        )
+    ),
+):
+    """
+    GET endpoint to get the rows of the shop changed or deleted since the
+    checkpoint of the client (0 for the first sync), the response contains the
+    checkpoint to send in the next sync
+    """
+    try:
+        return sync.find_changes(
+            db=db,
+            coffee_shop_id=current_user.coffee_shop_id,
+            since=since,
+            role=current_user.role,
+        )
+    except ShopsAppException as se:
+        raise HTTPException(status_code=se.status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
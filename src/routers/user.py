@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Response, status, HTTPException
+from fastapi import APIRouter, Depends, Query, Request, Response, status, HTTPException
 from sqlalchemy.orm import Session
 from src import schemas, models
 from src.models.user import UserRole
@@ -6,8 +6,23 @@ from src.helpers import user
 from src.settings.database import get_db
 from src.security.oauth2 import require_role
 from src.exceptions.exception import *
+from src.utils import catalog_versions, etag
+from src.utils.lanes import lane_route
+from src.utils.statement_budget import statement_budget
 
-router = APIRouter(tags=["Users"], prefix="/users")
+router = APIRouter(
+    tags=["Users"],
+    prefix="/users",
+    route_class=lane_route("admin"),
+)
+
+# the bulk creation runs for long (hashing up to 1000 passwords), it uses the
+# threads and the pool of the reports lane so it does not starve the admin requests
+bulk_router = APIRouter(
+    tags=["Users"],
+    prefix="/users",
+    route_class=lane_route("reports"),
+)
 
 
 @router.post("/", response_model=schemas.UserResponse)
@@ -35,6 +50,34 @@ def create_user_endpoint(
         )
 
 
+@bulk_router.post("/bulk", response_model=schemas.UsersBulkPOSTResponse)
+def create_users_endpoint(
+    request: schemas.UsersBulkPOSTRequestBody,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: schemas.TokenData = Depends(require_role([UserRole.ADMIN])),
+):
+    """
+    POST endpoint to create many users at once, the users that can not be
+    created are reported in errors and the other ones are created
+    """
+    try:
+        result = user.validate_and_create_users(
+            request=request,
+            db=db,
+            admin_coffee_shop_id=current_user.coffee_shop_id,
+        )
+        if result["created"]:
+            response.status_code = status.HTTP_201_CREATED
+        return result
+    except ShopsAppException as se:
+        raise HTTPException(status_code=se.status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
 @router.put("/{user_id}", response_model=schemas.UserResponse)
 def full_update_user_endpoint(
     user_id: int,
@@ -108,16 +151,44 @@ def partial_update_user_endpoint(
         )
 
 
-@router.get("/", response_model=list[schemas.UserResponse])
+# the users version and the page
+@router.get("/", response_model=schemas.PaginatedUserResponse)
+@statement_budget(2)
 def get_all_users_endpoint(
+    request: Request,
+    response: Response,
+    size: int = Query(100, ge=1, le=1000),
+    cursor: str = None,
+    role: UserRole = None,
+    branch_id: int = None,
     db: Session = Depends(get_db),
     current_user: schemas.TokenData = Depends(require_role([UserRole.ADMIN])),
 ):
     """
-    GET endpoint to get all users
+    GET endpoint to get the users page by page, optionally of a role or a branch,
+    the next_cursor of a page is sent as the cursor of the next one. It supports
+    If-None-Match
     """
     try:
-        return user.find_all_users(db=db, coffee_shop_id=current_user.coffee_shop_id)
+        users_etag = etag.catalog_etag(
+            db=db,
+            coffee_shop_id=current_user.coffee_shop_id,
+            catalog=catalog_versions.USERS,
+        )
+        not_modified = etag.not_modified_response(request=request, etag=users_etag)
+        if not_modified:
+            return not_modified
+        etag.set_etag(response, users_etag)
+        return user.find_users_page(
+            db=db,
+            coffee_shop_id=current_user.coffee_shop_id,
+            size=size,
+            cursor=cursor,
+            role=role,
+            branch_id=branch_id,
+        )
+    except ShopsAppException as se:
+        raise HTTPException(status_code=se.status_code, detail=se.message)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
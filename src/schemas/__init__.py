@@ -8,3 +8,5 @@ from src.schemas.order import *
 from src.schemas.order_item import *
 from src.schemas.user import *
 from src.schemas.report import *
+from src.schemas.monitoring import *
+from src.schemas.sync import *
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Optional
+from pydantic import BaseModel, field_validator
+from src.utils.phone_numbers import is_valid_phone_no, normalize_phone_no
 
 
 class CustomerPOSTRequestBody(BaseModel):
@@ -9,6 +11,15 @@ class CustomerPOSTRequestBody(BaseModel):
     name: str
     phone_no: str
 
+    @field_validator("phone_no")
+    @classmethod
+    def normalize_phone_no(cls, phone_no: str) -> str:
+        # every write path stores the same form of a number, see import_customers
+        phone_no = normalize_phone_no(phone_no)
+        if not is_valid_phone_no(phone_no):
+            raise ValueError("The phone number is not valid")
+        return phone_no
+
 
 class CustomerPUTRequestBody(CustomerPOSTRequestBody):
     """
@@ -31,3 +42,36 @@ class CustomerResponse(BaseModel):
     class Config:
         orm_mode = True
         from_attributes = True
+
+
+class ImportRowError(BaseModel):
+    """
+    pydantic schema for a row rejected by a bulk import
+    """
+
+    line: int
+    reason: str
+
+
+class CustomerImportResponse(BaseModel):
+    """
+    pydantic schema for the summary of a customer import, only the first
+    rejected rows are listed in errors
+    """
+
+    inserted: int
+    updated: int
+    unchanged: int
+    rejected: int
+    errors: list[ImportRowError]
+
+
+class PaginatedCustomerResponse(BaseModel):
+    """
+    pydantic schema for a page of customers in GET response body, next_cursor is
+    sent to get the next page and is null on the last page
+    """
+
+    page_size: int
+    next_cursor: Optional[str]
+    customers: list[CustomerResponse]
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+
+
+class LaneStatistics(BaseModel):
+    """
+    pydantic schema for the statistics of an execution lane
+    """
+
+    lane: str
+    capacity: int
+    in_use: int
+    queue_depth: int
+    statement_timeouts: int
+    lock_timeouts: int
+
+
+class HealthStatus(BaseModel):
+    """
+    pydantic schema for the liveness and readiness probes
+    """
+
+    status: str
+    checks: dict[str, bool] = {}
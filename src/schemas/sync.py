@@ -0,0 +1,66 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+from src.schemas.branch import BranchResponse
+from src.schemas.customer import CustomerResponse
+from src.schemas.inventory_item import InventoryItemResponse
+from src.schemas.menu_item import MenuItemResponse
+from src.schemas.user import UserResponse
+
+
+class MenuItemSyncResponse(MenuItemResponse):
+    """
+    pydantic schema for a changed MenuItem in the sync response
+    """
+
+    deleted: bool
+    updated_at: datetime
+
+
+class InventoryItemSyncResponse(InventoryItemResponse):
+    """
+    pydantic schema for a changed InventoryItem in the sync response
+    """
+
+    deleted: bool
+    updated_at: datetime
+
+
+class CustomerSyncResponse(CustomerResponse):
+    """
+    pydantic schema for a changed Customer in the sync response
+    """
+
+    updated_at: datetime
+
+
+class BranchSyncResponse(BranchResponse):
+    """
+    pydantic schema for a changed Branch in the sync response
+    """
+
+    deleted: bool
+    updated_at: datetime
+
+
+class UserSyncResponse(UserResponse):
+    """
+    pydantic schema for a changed User in the sync response
+    """
+
+    deleted: bool
+    updated_at: datetime
+
+
+class SyncResponse(BaseModel):
+    """
+    pydantic schema for the changes of a shop since a checkpoint, the entities
+    the user is not allowed to list are omitted
+    """
+
+    checkpoint: int
+    menu_items: Optional[list[MenuItemSyncResponse]] = None
+    inventory_items: Optional[list[InventoryItemSyncResponse]] = None
+    customers: Optional[list[CustomerSyncResponse]] = None
+    branches: Optional[list[BranchSyncResponse]] = None
+    users: Optional[list[UserSyncResponse]] = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, root_validator
+from pydantic import BaseModel, Field, root_validator
 from src.models.user import UserRole
 from typing import Optional
 from src.exceptions.exception import ShopsAppException
@@ -99,6 +99,44 @@ class UserResponse(BaseModel):
         orm_mode = True
 
 
+class PaginatedUserResponse(BaseModel):
+    """
+    Pydantic schema for a page of users in GET response body, next_cursor is
+    sent to get the next page and is null on the last page
+    """
+
+    page_size: int
+    next_cursor: Optional[str]
+    users: list[UserResponse]
+
+
+class UsersBulkPOSTRequestBody(BaseModel):
+    """
+    Pydantic schema for the users of a bulk POST request body
+    """
+
+    users: list[UserPOSTRequestBody] = Field(..., min_length=1, max_length=1000)
+
+
+class UserBulkError(BaseModel):
+    """
+    Pydantic schema for a user rejected by a bulk creation, index is its position
+    in the request body
+    """
+
+    index: int
+    reason: str
+
+
+class UsersBulkPOSTResponse(BaseModel):
+    """
+    Pydantic schema for the result of a bulk creation of users
+    """
+
+    created: list[UserResponse]
+    errors: list[UserBulkError]
+
+
 class UserInRestorePATCHRequestBody(BaseModel):
     """
     Pydantic schema for User PATCH request body to restore a deleted user
@@ -5,6 +5,12 @@ from src.models.user import UserRole
 from src.settings.settings import JWT_TOKEN_SETTINGS
 from typing import Optional
 
+# parsing a PEM key is much slower than signing with it, so the keys are parsed
+# once when the module is loaded instead of on every encode / decode
+_signing_algorithm = jwt.get_algorithm_by_name(JWT_TOKEN_SETTINGS["ALGORITHM"])
+PRIVATE_KEY = _signing_algorithm.prepare_key(JWT_TOKEN_SETTINGS["PRIVATE_KEY"])
+PUBLIC_KEY = _signing_algorithm.prepare_key(JWT_TOKEN_SETTINGS["PUBLIC_KEY"])
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -29,7 +35,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     # create jwt token with the specified data
     encoded_jwt = jwt.encode(
         to_encode,
-        JWT_TOKEN_SETTINGS["PRIVATE_KEY"],
+        PRIVATE_KEY,
         algorithm=JWT_TOKEN_SETTINGS["ALGORITHM"],
     )
     return encoded_jwt
@@ -63,7 +69,7 @@ def verify_token(token: str, credentials_exception) -> schemas.TokenData:
     try:
         payload = jwt.decode(
             token,
-            JWT_TOKEN_SETTINGS["PUBLIC_KEY"],
+            PUBLIC_KEY,
             algorithms=JWT_TOKEN_SETTINGS["ALGORITHM"],
         )
 
@@ -1,35 +1,57 @@
-from fastapi import Depends, status, HTTPException
-from fastapi.security import OAuth2PasswordBearer
-from typing import Annotated
+import hmac
+from fastapi import Depends, Request, status, HTTPException
+from fastapi.security import (
+    HTTPAuthorizationCredentials,
+    HTTPBearer,
+    OAuth2PasswordBearer,
+)
+from typing import Annotated, Optional
 from src.security.jwt import verify_token
 from src.models.user import UserRole
 from src import schemas
 from src.helpers import user
 from sqlalchemy.orm import Session
 from src.settings.database import get_db
+from src.utils.metrics import AUTH_REJECTIONS
+from src.settings.settings import METRICS_SETTINGS
+from src.utils.request_timing import measure
 
 # define the route from where the fastapi will fetch the token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# the metrics scrapers send a static token, not a user token
+metrics_scheme = HTTPBearer(auto_error=False)
+
 
 def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)]
+    request: Request, token: Annotated[str, Depends(oauth2_scheme)]
 ) -> schemas.TokenData:
     """
     This function will return the current user based on the token data after
     verifying his/her token
     *Args:
+        request: the incoming request, its state may hold the token data already
+        verified by the admission control middleware
         token: the token obtained as a dependency from oauth2_schem
     *Returns:
         Token Data contains the user's data extracted from the token if it
         is valid
     """
+    token_data = getattr(request.state, "token_data", None)
+    if token_data is not None:
+        return token_data
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    token_data = verify_token(token, credentials_exception)
+    try:
+        with measure("auth"):
+            token_data = verify_token(token, credentials_exception)
+    except HTTPException:
+        AUTH_REJECTIONS.inc(reason="invalid_token")
+        raise
     return token_data
 
 
@@ -45,6 +67,7 @@ def require_role(allowed_roles: list[UserRole]):
 
     def role_checker(current_user: schemas.TokenData = Depends(get_current_user)):
         if current_user.role not in allowed_roles:
+            AUTH_REJECTIONS.inc(reason="forbidden_role")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You do not have the necessary permissions",
@@ -52,3 +75,30 @@ def require_role(allowed_roles: list[UserRole]):
         return current_user
 
     return role_checker
+
+
+def require_metrics_token(
+    credentials: Annotated[
+        Optional[HTTPAuthorizationCredentials], Depends(metrics_scheme)
+    ],
+) -> None:
+    """
+    This function will check that the request is sent by a metrics scraper
+    *Args:
+        credentials: the bearer token of the request, if any
+    *Returns:
+        None if the token is the METRICS_TOKEN setting, raise exception otherwise.
+        The metrics are not found while no token is set
+    """
+    expected_token = METRICS_SETTINGS["TOKEN"]
+    if not expected_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not hmac.compare_digest(
+        credentials.credentials.encode(), expected_token.encode()
+    ):
+        AUTH_REJECTIONS.inc(reason="invalid_metrics_token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -1,23 +1,172 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from fastapi import status
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, ExceptionContext
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from src.settings.settings import DATABASE_SETTINGS
+from src.exceptions.exception import ShopsAppException
+from src.settings.settings import DATABASE_SETTINGS, LANE_SETTINGS
+from src.utils.lanes import DEFAULT_LANE, current_lane
+from src.utils.metrics import DB_POOL_CHECKOUT_WAIT, DB_TIMEOUTS
+from src.utils import profiler, statement_budget
+from src.utils.request_timing import current_timings
 
+logger = logging.getLogger(__name__)
 
-# creating the engine
-engine = create_engine(url=DATABASE_SETTINGS["URL"])
+# postgres error codes raised when statement_timeout and lock_timeout expire
+QUERY_CANCELED = "57014"
+LOCK_NOT_AVAILABLE = "55P03"
 
-# creating the db session
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+class _TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each connection checkout waits
+    """
+
+    lane = DEFAULT_LANE
+
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(
+                time.perf_counter() - started_at, lane=self.lane
+            )
+
+
+def _create_lane_engine(lane: str, lane_settings: dict) -> Engine:
+    """
+    Create the engine (connection pool) of a lane, its connections are opened
+    with the statement and lock timeouts of the lane and its statements are
+    timed into the current request timings (and profile)
+    *Args:
+        lane (str): the name of the lane
+        lane_settings (dict): the settings of the lane
+    *Returns:
+        the created engine
+    """
+    lane_engine = create_engine(
+        url=DATABASE_SETTINGS["URL"],
+        pool_size=lane_settings["POOL_SIZE"],
+        max_overflow=lane_settings["MAX_OVERFLOW"],
+        # a pool class per lane, so the lane survives pool re-creation
+        poolclass=type(f"{lane.title()}QueuePool", (_TimedQueuePool,), {"lane": lane}),
+        connect_args={
+            "options": f"-c statement_timeout={lane_settings['STATEMENT_TIMEOUT_MS']}"
+            f" -c lock_timeout={lane_settings['LOCK_TIMEOUT_MS']}"
+        },
+    )
+
+    @event.listens_for(lane_engine, "handle_error", retval=True)
+    def translate_timeout_error(context: ExceptionContext):
+        pgcode = getattr(context.original_exception, "pgcode", None)
+        if pgcode == QUERY_CANCELED:
+            DB_TIMEOUTS.inc(lane=lane, kind="statement")
+            return ShopsAppException(
+                message="The request took too long to complete, please retry later",
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            )
+        if pgcode == LOCK_NOT_AVAILABLE:
+            DB_TIMEOUTS.inc(lane=lane, kind="lock")
+            return ShopsAppException(
+                message="The resource is busy, please retry later",
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        return None
+
+    @event.listens_for(lane_engine, "before_cursor_execute")
+    def start_statement_timer(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("statement_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(lane_engine, "after_cursor_execute")
+    def stop_statement_timer(conn, cursor, statement, parameters, context, many):
+        duration = time.perf_counter() - conn.info["statement_started_at"].pop()
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add("db", duration)
+            timings.db_statements += 1
+        profiler.record_statement(statement, duration)
+        statement_budget.record_statement(statement)
+
+    return lane_engine
+
+
+# creating an engine (connection pool) for each execution lane
+engines = {
+    lane: _create_lane_engine(lane=lane, lane_settings=lane_settings)
+    for lane, lane_settings in LANE_SETTINGS.items()
+}
+engine = engines[DEFAULT_LANE]
+
+
+def warm_up_pools() -> bool:
+    """
+    Open the connections of every lane pool up front, so that the first requests
+    of a worker do not pay for the connection setup
+    *Returns:
+        True if every pool could be filled, False otherwise
+    """
+    for lane, lane_engine in engines.items():
+        connections = []
+        try:
+            for _ in range(LANE_SETTINGS[lane]["POOL_SIZE"]):
+                connection = lane_engine.connect()
+                connections.append(connection)
+                connection.execute(text("SELECT 1"))
+        except SQLAlchemyError as e:
+            logger.warning("Could not warm up the %s database pool: %s", lane, e)
+            return False
+        finally:
+            for connection in connections:
+                connection.close()
+    return True
+
+
+def is_database_available() -> bool:
+    """
+    Check that the database answers, used by the readiness probe
+    """
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except SQLAlchemyError:
+        return False
+    return True
+
+
+def dispose_pools() -> None:
+    """
+    Close the connections of every lane pool, called when the worker shuts down
+    """
+    for lane_engine in engines.values():
+        lane_engine.dispose()
+
+
+# creating the db session, the objects stay usable after the commit so the
+# response can be built without reloading them
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
 
 # declare a mapping Base class
 Base = declarative_base()
 
 
-# Dependency to get the database session
+# Dependency to get the database session, bound to the pool of the current lane.
+# The session is the unit of work of the request: helpers only flush, the
+# transaction is committed once when the request succeeds and rolled back if it
+# fails, so multi-entity writes are atomic
 def get_db():
-    db = SessionLocal()
+    db = SessionLocal(bind=engines[current_lane.get()])
     try:
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
@@ -24,3 +24,178 @@ JWT_TOKEN_SETTINGS = {
     "ALGORITHM": os.getenv("ALGORITHM"),
     "ACCESS_TOKEN_EXPIRE_MINUTES": os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"),
 }
+
+
+# admission control settings, limits are applied per coffee shop and traffic class.
+# The limits are kept in the memory of each worker process: with N workers a shop
+# can get up to N times the concurrency and rate of its class
+ADMISSION_SETTINGS = {
+    "ENABLED": os.getenv("ADMISSION_ENABLED", "true").lower() == "true",
+    # seconds a client is asked to wait when a request is shed due to concurrency
+    "OVERLOAD_RETRY_AFTER": int(os.getenv("ADMISSION_OVERLOAD_RETRY_AFTER", 1)),
+    "CLASSES": {
+        "pos": {
+            "MAX_CONCURRENCY": int(os.getenv("ADMISSION_POS_MAX_CONCURRENCY", 16)),
+            "RATE_PER_SECOND": float(os.getenv("ADMISSION_POS_RATE", 20)),
+            "BURST": int(os.getenv("ADMISSION_POS_BURST", 40)),
+        },
+        "reads": {
+            "MAX_CONCURRENCY": int(os.getenv("ADMISSION_READS_MAX_CONCURRENCY", 16)),
+            "RATE_PER_SECOND": float(os.getenv("ADMISSION_READS_RATE", 50)),
+            "BURST": int(os.getenv("ADMISSION_READS_BURST", 100)),
+        },
+        "reports": {
+            "MAX_CONCURRENCY": int(os.getenv("ADMISSION_REPORTS_MAX_CONCURRENCY", 2)),
+            "RATE_PER_SECOND": float(os.getenv("ADMISSION_REPORTS_RATE", 1)),
+            "BURST": int(os.getenv("ADMISSION_REPORTS_BURST", 5)),
+        },
+    },
+}
+# a token bucket needs a positive rate, fail at startup rather than on every request
+for traffic_class, class_settings in ADMISSION_SETTINGS["CLASSES"].items():
+    if class_settings["RATE_PER_SECOND"] <= 0:
+        raise ValueError(
+            f"The admission rate of the {traffic_class} class must be positive,"
+            f" got {class_settings['RATE_PER_SECOND']}"
+        )
+
+
+# execution lanes, each lane has its own thread capacity, database pool and statement
+# timeouts so that slow traffic in one lane cannot starve the others. Every worker
+# process has its own lanes, with N workers the database gets up to
+# N * (POOL_SIZE + MAX_OVERFLOW) connections per lane
+LANE_SETTINGS = {
+    "pos": {
+        "THREADS": int(os.getenv("LANE_POS_THREADS", 20)),
+        "POOL_SIZE": int(os.getenv("LANE_POS_POOL_SIZE", 10)),
+        "MAX_OVERFLOW": int(os.getenv("LANE_POS_MAX_OVERFLOW", 10)),
+        "STATEMENT_TIMEOUT_MS": int(os.getenv("LANE_POS_STATEMENT_TIMEOUT_MS", 2000)),
+        "LOCK_TIMEOUT_MS": int(os.getenv("LANE_POS_LOCK_TIMEOUT_MS", 500)),
+    },
+    "admin": {
+        "THREADS": int(os.getenv("LANE_ADMIN_THREADS", 8)),
+        "POOL_SIZE": int(os.getenv("LANE_ADMIN_POOL_SIZE", 5)),
+        "MAX_OVERFLOW": int(os.getenv("LANE_ADMIN_MAX_OVERFLOW", 3)),
+        "STATEMENT_TIMEOUT_MS": int(os.getenv("LANE_ADMIN_STATEMENT_TIMEOUT_MS", 5000)),
+        "LOCK_TIMEOUT_MS": int(os.getenv("LANE_ADMIN_LOCK_TIMEOUT_MS", 1000)),
+    },
+    "reports": {
+        "THREADS": int(os.getenv("LANE_REPORTS_THREADS", 4)),
+        "POOL_SIZE": int(os.getenv("LANE_REPORTS_POOL_SIZE", 2)),
+        "MAX_OVERFLOW": int(os.getenv("LANE_REPORTS_MAX_OVERFLOW", 2)),
+        "STATEMENT_TIMEOUT_MS": int(
+            os.getenv("LANE_REPORTS_STATEMENT_TIMEOUT_MS", 60000)
+        ),
+        "LOCK_TIMEOUT_MS": int(os.getenv("LANE_REPORTS_LOCK_TIMEOUT_MS", 1000)),
+    },
+}
+
+
+# GET /metrics answers only the scrapers sending this token as a bearer token,
+# it is disabled (404) while no token is set. The metrics are the ones of the
+# worker process answering the scrape
+METRICS_SETTINGS = {
+    "TOKEN": os.getenv("METRICS_TOKEN"),
+}
+
+
+# per request profiler settings, profiling is requested by an admin with the
+# X-Profile header and is rate limited in each worker process, with N workers up
+# to N times RATE_PER_MINUTE requests are profiled
+PROFILER_SETTINGS = {
+    "ENABLED": os.getenv("PROFILER_ENABLED", "true").lower() == "true",
+    "RATE_PER_MINUTE": float(os.getenv("PROFILER_RATE_PER_MINUTE", 2)),
+    "BURST": int(os.getenv("PROFILER_BURST", 2)),
+}
+if PROFILER_SETTINGS["RATE_PER_MINUTE"] <= 0:
+    raise ValueError(
+        "The profiler rate must be positive,"
+        f" got {PROFILER_SETTINGS['RATE_PER_MINUTE']}"
+    )
+
+
+# per request SQL statement budget, used to catch N+1 queries. The mode is "log"
+# to log the violations, "raise" to fail the request (use it in tests) or "off"
+STATEMENT_BUDGET_SETTINGS = {
+    "MODE": os.getenv("STATEMENT_BUDGET_MODE", "log").lower(),
+    "DEFAULT_BUDGET": int(os.getenv("STATEMENT_BUDGET_DEFAULT", 25)),
+    # the same statement executed this many times in a request is an N+1 query
+    "REPEATED_STATEMENT_THRESHOLD": int(
+        os.getenv("STATEMENT_BUDGET_REPEATED_THRESHOLD", 5)
+    ),
+}
+
+
+# production server settings, used by server.py
+SERVER_SETTINGS = {
+    "HOST": os.getenv("SERVER_HOST", "0.0.0.0"),
+    "PORT": int(os.getenv("SERVER_PORT", 8000)),
+    # number of worker processes. The metrics, the admission limits, the lanes and
+    # the profiler rate are kept in the memory of each worker, so it defaults to a
+    # single worker, with N workers each of them is scraped and limited on its own
+    "WORKERS": int(os.getenv("SERVER_WORKERS", 1)),
+    # "auto" uses uvloop and httptools when they are installed
+    "LOOP": os.getenv("SERVER_LOOP", "auto"),
+    "HTTP": os.getenv("SERVER_HTTP", "auto"),
+    "KEEPALIVE_TIMEOUT": int(os.getenv("SERVER_KEEPALIVE_TIMEOUT", 5)),
+    "BACKLOG": int(os.getenv("SERVER_BACKLOG", 2048)),
+    # maximum number of concurrent connections of a worker before answering 503
+    "LIMIT_CONCURRENCY": (
+        int(os.getenv("SERVER_LIMIT_CONCURRENCY"))
+        if os.getenv("SERVER_LIMIT_CONCURRENCY")
+        else None
+    ),
+    # seconds given to the in-flight requests to finish on shutdown
+    "GRACEFUL_SHUTDOWN_TIMEOUT": int(os.getenv("SERVER_GRACEFUL_SHUTDOWN_TIMEOUT", 30)),
+}
+
+
+# response settings, FAST_JSON builds the big list responses (orders, customers
+# and menu items) directly from SQL rows and encodes them with orjson, skipping
+# the ORM objects and the response_model validation. The streamed exports fetch
+# EXPORT_BATCH_SIZE rows at a time from a server-side cursor
+RESPONSE_SETTINGS = {
+    "FAST_JSON": os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true",
+    "EXPORT_BATCH_SIZE": int(os.getenv("EXPORT_BATCH_SIZE", 1000)),
+}
+
+
+# response compression settings, brotli and zstd are offered when the brotli and
+# zstandard packages are installed, gzip otherwise
+COMPRESSION_SETTINGS = {
+    "ENABLED": os.getenv("COMPRESSION_ENABLED", "true").lower() == "true",
+    # responses smaller than this (in bytes) are not compressed
+    "MINIMUM_SIZE": int(os.getenv("COMPRESSION_MINIMUM_SIZE", 1024)),
+    # responses bigger than this (in bytes) are compressed in a worker thread
+    "OFFLOAD_SIZE": int(os.getenv("COMPRESSION_OFFLOAD_SIZE", 128 * 1024)),
+    "GZIP_LEVEL": int(os.getenv("COMPRESSION_GZIP_LEVEL", 6)),
+    "BROTLI_QUALITY": int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4)),
+    "ZSTD_LEVEL": int(os.getenv("COMPRESSION_ZSTD_LEVEL", 3)),
+}
+
+
+# bulk imports, the rows are parsed and written CHUNK_SIZE at a time, the first
+# MAX_REPORTED_ERRORS rejected rows are reported with their line and reason.
+# The passwords of the imported users are hashed by HASHING_PROCESSES processes
+# per worker
+IMPORT_SETTINGS = {
+    "CHUNK_SIZE": int(os.getenv("IMPORT_CHUNK_SIZE", 5000)),
+    "MAX_REPORTED_ERRORS": int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", 100)),
+    "HASHING_PROCESSES": int(
+        os.getenv("IMPORT_HASHING_PROCESSES", min(4, os.cpu_count() or 1))
+    ),
+}
+
+
+# in-process catalog caches (the menu of each shop), an entry is valid while the
+# version of its catalog did not change. The versions are bumped in the database
+# by every change and broadcast to the other workers with Postgres LISTEN/NOTIFY,
+# without the listener they are read from the database on every lookup
+CACHE_SETTINGS = {
+    "ENABLED": os.getenv("CACHE_ENABLED", "true").lower() == "true",
+    # number of shops whose menu is kept in memory by a worker
+    "MENU_MAX_SHOPS": int(os.getenv("CACHE_MENU_MAX_SHOPS", 1000)),
+    "VERSION_LISTENER": os.getenv("CACHE_VERSION_LISTENER", "true").lower() == "true",
+    # seconds to wait before reconnecting a lost listener connection
+    "LISTENER_RECONNECT_DELAY": float(os.getenv("CACHE_LISTENER_RECONNECT_DELAY", 5)),
+}
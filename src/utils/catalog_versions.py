@@ -0,0 +1,260 @@
+import logging
+import select
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+from sqlalchemy import event, func
+from sqlalchemy import select as sql_select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from src import models
+from src.settings import database
+from src.settings.settings import CACHE_SETTINGS
+from src.utils.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# catalogs of a coffee shop that have a version
+MENU = "menu"
+INVENTORY = "inventory"
+BRANCHES = "branches"
+USERS = "users"
+
+# the Postgres channel the version bumps are notified on
+CHANNEL = "catalog_versions"
+
+# seconds the listener waits for a notification before checking if it must stop
+_POLL_TIMEOUT = 1.0
+
+# the latest known version of each (coffee shop id, catalog), only trusted while
+# the listener is connected, the generation changes every time it (re)connects
+_versions: dict[tuple[int, str], int] = {}
+_versions_lock = threading.Lock()
+_generation = 0
+_listening = False
+
+
+def _remember_version(key: tuple[int, str], version: int, generation: int) -> None:
+    # versions only increase, so a late write never replaces a newer version
+    with _versions_lock:
+        if generation == _generation and version > _versions.get(key, -1):
+            _versions[key] = version
+
+
+def _set_listening(listening: bool) -> None:
+    global _generation, _listening
+    with _versions_lock:
+        # the notifications sent while disconnected are lost, forget everything
+        _versions.clear()
+        _generation += 1
+        _listening = listening
+
+
+def get_version(db: Session, coffee_shop_id: int, catalog: str) -> int:
+    """
+    Get the current version of a catalog of a coffee shop, from memory when the
+    listener keeps the versions up to date, from the database otherwise
+    *Args:
+        db (Session): the database session
+        coffee_shop_id (int): the id of the coffee shop
+        catalog (str): the name of the catalog
+    *Returns:
+        the version of the catalog, 0 if it never changed
+    """
+    key = (coffee_shop_id, catalog)
+    with _versions_lock:
+        generation = _generation
+        if _listening and key in _versions:
+            return _versions[key]
+    version = db.execute(
+        sql_select(models.CatalogVersion.version).where(
+            models.CatalogVersion.coffee_shop_id == coffee_shop_id,
+            models.CatalogVersion.catalog == catalog,
+        )
+    ).scalar()
+    version = version or 0
+    if _listening:
+        _remember_version(key, version, generation)
+    return version
+
+
+def bump_version(db: Session, coffee_shop_id: int, catalog: str) -> int:
+    """
+    Increment the version of a catalog of a coffee shop after a change. The
+    other workers are notified when the transaction commits, this worker
+    remembers the new version as soon as it is committed
+    *Args:
+        db (Session): the database session
+        coffee_shop_id (int): the id of the coffee shop
+        catalog (str): the name of the catalog
+    *Returns:
+        the new version of the catalog
+    """
+    query = insert(models.CatalogVersion).values(
+        coffee_shop_id=coffee_shop_id, catalog=catalog, version=1
+    )
+    query = query.on_conflict_do_update(
+        index_elements=[
+            models.CatalogVersion.coffee_shop_id,
+            models.CatalogVersion.catalog,
+        ],
+        set_={"version": models.CatalogVersion.version + 1},
+    ).returning(models.CatalogVersion.version)
+    version = db.execute(query).scalar_one()
+    # NOTIFY is transactional, it is only delivered if the transaction commits
+    db.execute(
+        sql_select(func.pg_notify(CHANNEL, f"{coffee_shop_id}:{catalog}:{version}"))
+    )
+    db.info.setdefault("bumped_catalog_versions", {})[
+        (coffee_shop_id, catalog)
+    ] = version
+    return version
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_committed_versions(session: Session) -> None:
+    # read your writes: the next request of this worker sees the new version even
+    # before the notification of the commit comes back from the listener
+    bumped_versions = session.info.pop("bumped_catalog_versions", {})
+    with _versions_lock:
+        generation = _generation
+    for key, version in bumped_versions.items():
+        _remember_version(key, version, generation)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_versions(session: Session) -> None:
+    session.info.pop("bumped_catalog_versions", None)
+
+
+class VersionedCache:
+    """
+    In-process cache of a catalog of each coffee shop. An entry is used while
+    the version of the catalog is the one it was loaded with, the least recently
+    used shops are evicted above max_entries. The cached values are shared
+    between requests and must not be modified
+    """
+
+    def __init__(
+        self,
+        name: str,
+        catalog: str,
+        loader: Callable[[Session, int], Any],
+        max_entries: int,
+    ):
+        self.name = name
+        self.catalog = catalog
+        self.loader = loader
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, tuple[int, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, coffee_shop_id: int) -> Any:
+        """
+        Get the catalog of a coffee shop, loaded with the loader on a miss
+        *Args:
+            db (Session): the database session
+            coffee_shop_id (int): the id of the coffee shop
+        *Returns:
+            the cached or loaded catalog
+        """
+        if not CACHE_SETTINGS["ENABLED"]:
+            return self.loader(db, coffee_shop_id)
+        # the version is read before the data, so the data is never older
+        version = get_version(
+            db=db, coffee_shop_id=coffee_shop_id, catalog=self.catalog
+        )
+        with self._lock:
+            entry = self._entries.get(coffee_shop_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(coffee_shop_id)
+                CACHE_REQUESTS.inc(cache=self.name, result="hit")
+                return entry[1]
+        CACHE_REQUESTS.inc(cache=self.name, result="miss")
+        value = self.loader(db, coffee_shop_id)
+        with self._lock:
+            self._entries[coffee_shop_id] = (version, value)
+            self._entries.move_to_end(coffee_shop_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+class _VersionListener(threading.Thread):
+    """
+    Thread that LISTENs to the version bumps of all the workers on a dedicated
+    connection and keeps the known versions up to date, it reconnects after a
+    failure
+    """
+
+    def __init__(self):
+        super().__init__(name="catalog-version-listener", daemon=True)
+        self._stopped = threading.Event()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _listen(self) -> None:
+        # a connection of its own, detached from the pool
+        connection = database.engine.raw_connection()
+        connection.detach()
+        try:
+            connection.dbapi_connection.autocommit = True
+            with connection.dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            _set_listening(True)
+            logger.info("Listening to the catalog versions")
+            dbapi_connection = connection.dbapi_connection
+            while not self._stopped.is_set():
+                if not select.select([dbapi_connection], [], [], _POLL_TIMEOUT)[0]:
+                    continue
+                dbapi_connection.poll()
+                with _versions_lock:
+                    generation = _generation
+                while dbapi_connection.notifies:
+                    notification = dbapi_connection.notifies.pop(0)
+                    coffee_shop_id, catalog, version = notification.payload.split(":")
+                    _remember_version(
+                        (int(coffee_shop_id), catalog), int(version), generation
+                    )
+        finally:
+            _set_listening(False)
+            connection.close()
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                logger.warning("The catalog version listener failed: %s", e)
+            self._stopped.wait(CACHE_SETTINGS["LISTENER_RECONNECT_DELAY"])
+
+
+_listener: Optional[_VersionListener] = None
+
+
+def start_listener() -> None:
+    """
+    Start listening to the version bumps of the other workers, called when the
+    worker starts. Without the listener the versions are read from the database
+    """
+    global _listener
+    if (
+        not CACHE_SETTINGS["ENABLED"]
+        or not CACHE_SETTINGS["VERSION_LISTENER"]
+        or database.engine.dialect.name != "postgresql"
+    ):
+        return
+    _listener = _VersionListener()
+    _listener.start()
+
+
+def stop_listener() -> None:
+    """
+    Stop the listener, called when the worker shuts down
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener.join(timeout=_POLL_TIMEOUT * 2)
+        _listener = None
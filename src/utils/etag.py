@@ -0,0 +1,76 @@
+from typing import Optional
+from fastapi import Request, Response, status
+from sqlalchemy.orm import Session
+from src.middlewares.compression import ENCODINGS
+from src.utils import catalog_versions
+
+# the client revalidates every time, a revalidation of an unchanged catalog is a
+# 304 without a body
+CACHE_CONTROL = "private, no-cache"
+
+
+def catalog_etag(db: Session, coffee_shop_id: int, catalog: str) -> str:
+    """
+    Build the strong ETag of a catalog of a coffee shop from its version, it must
+    be computed before the catalog is loaded so that it is never newer than the body
+    *Args:
+        db (Session): the database session, only used when the version is not known
+        coffee_shop_id (int): the id of the coffee shop
+        catalog (str): the name of the catalog
+    *Returns:
+        the quoted entity tag
+    """
+    version = catalog_versions.get_version(
+        db=db, coffee_shop_id=coffee_shop_id, catalog=catalog
+    )
+    return f'"{catalog}-{coffee_shop_id}-{version}"'
+
+
+def _matching_tag(if_none_match: str, etag: str) -> Optional[str]:
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return etag
+        # If-None-Match uses the weak comparison, and the compression middleware
+        # suffixes the tag of a compressed body with its encoding
+        candidate = tag[2:] if tag.startswith("W/") else tag
+        for encoding in ENCODINGS:
+            if candidate.endswith(f'-{encoding}"'):
+                candidate = f'{candidate[: -len(encoding) - 2]}"'
+                break
+        if candidate == etag:
+            return tag
+    return None
+
+
+def not_modified_response(request: Request, etag: str) -> Optional[Response]:
+    """
+    Check the If-None-Match header of a request against the current ETag
+    *Args:
+        request (Request): the request
+        etag (str): the current ETag of the resource
+    *Returns:
+        a 304 response if the client has the current version, None otherwise
+    """
+    tag = _matching_tag(request.headers.get("if-none-match", ""), etag)
+    if tag is None:
+        return None
+    # the tag of the representation the client has, compressed or not
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": tag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def set_etag(response: Response, etag: str) -> Response:
+    """
+    Set the ETag and Cache-Control headers of a response
+    *Args:
+        response (Response): the response, or the response parameter of an endpoint
+        etag (str): the ETag of the body
+    *Returns:
+        the response
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
@@ -0,0 +1,43 @@
+import json
+from datetime import date
+from enum import Enum
+from typing import Any
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode plain data (dicts, lists, datetimes, enums) to JSON, with orjson when
+    it is installed and with the standard json module otherwise
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response for content built directly from SQL rows. Returning it from an
+    endpoint skips the response_model validation and serialization, so the
+    content must already have the shape of the response model
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
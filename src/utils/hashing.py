@@ -1,8 +1,51 @@
+import multiprocessing
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
 from passlib.context import CryptContext
+from src.settings.settings import IMPORT_SETTINGS
+from src.utils.metrics import BCRYPT_IN_FLIGHT
 
 # get the crypt context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# a hash of a random secret, verified against when no user matches the login
+# credentials so that every login attempt costs exactly one bcrypt verification
+DUMMY_PASSWORD_HASH = pwd_context.hash(secrets.token_urlsafe(16))
+
+# the processes hashing the passwords of the bulk imports, started on first use
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawned processes, forking the threads and database connections of
+            # the worker is not safe
+            _process_pool = ProcessPoolExecutor(
+                max_workers=IMPORT_SETTINGS["HASHING_PROCESSES"],
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """
+    Stop the hashing processes, called when the worker shuts down
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(cancel_futures=True)
+            _process_pool = None
+
 
 class Hash:
     @classmethod
@@ -14,7 +57,27 @@ class Hash:
         *Returns:
             The hashed password using BCrypt algorithm
         """
-        return pwd_context.hash(password)
+        BCRYPT_IN_FLIGHT.inc()
+        try:
+            return pwd_context.hash(password)
+        finally:
+            BCRYPT_IN_FLIGHT.dec()
+
+    @classmethod
+    def bcrypt_hash_many(cls, passwords: list[str]) -> list[str]:
+        """
+        Hash many passwords using bcrypt algorithm, in parallel in a pool of
+        processes so that a bulk import uses every core
+        *Args:
+            passwords: the passwords to be hashed
+        *Returns:
+            The hashed passwords, in the same order
+        """
+        BCRYPT_IN_FLIGHT.inc(len(passwords))
+        try:
+            return list(_get_process_pool().map(_hash_password, passwords))
+        finally:
+            BCRYPT_IN_FLIGHT.dec(len(passwords))
 
     @classmethod
     def verify(cls, plain_password: str, hashed_password: str) -> bool:
@@ -26,4 +89,8 @@ class Hash:
         *Returns:
             True if the hashed password matches the plain password, False otherwise
         """
-        return pwd_context.verify(secret=plain_password, hash=hashed_password)
+        BCRYPT_IN_FLIGHT.inc()
+        try:
+            return pwd_context.verify(secret=plain_password, hash=hashed_password)
+        finally:
+            BCRYPT_IN_FLIGHT.dec()
@@ -0,0 +1,38 @@
+from contextlib import contextmanager
+from fastapi import status
+from sqlalchemy.exc import IntegrityError
+from src.exceptions.exception import ShopsAppException
+
+# postgres error code raised when a unique constraint is violated
+UNIQUE_VIOLATION = "23505"
+
+
+@contextmanager
+def unique_violation_error(
+    constraints: tuple[str, ...],
+    message: str,
+    status_code: int = status.HTTP_409_CONFLICT,
+):
+    """
+    Context manager translating the violation of one of the given unique
+    constraints by the statements of its block (usually a flush) into a
+    ShopsAppException, e.g.
+        with unique_violation_error(("unique_phone_shop",), "Phone number already exists"):
+            db.flush()
+    The transaction can not be used after the violation, the request fails and
+    its session is rolled back
+    *Args:
+        constraints (tuple[str, ...]): the names of the unique constraints
+        message (str): the message of the raised exception
+        status_code (int): the status code of the raised exception
+    """
+    try:
+        yield
+    except IntegrityError as e:
+        diag = getattr(e.orig, "diag", None)
+        if (
+            getattr(e.orig, "pgcode", None) == UNIQUE_VIOLATION
+            and getattr(diag, "constraint_name", None) in constraints
+        ):
+            raise ShopsAppException(message=message, status_code=status_code)
+        raise
@@ -0,0 +1,155 @@
+import time
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Iterator
+import anyio.to_thread
+from anyio import CancelScope, CapacityLimiter
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from src.settings.settings import LANE_SETTINGS, STATEMENT_BUDGET_SETTINGS
+from src.utils.metrics import Gauge
+from src.utils.profiler import profiled_endpoint
+from src.utils.request_timing import record_handler_phases, timed_endpoint
+from src.utils.statement_budget import check_statement_budget, count_statements
+
+DEFAULT_LANE = "admin"
+
+# extra threads in the shared pool for sync work that does not run in a lane
+THREAD_POOL_HEADROOM = 8
+
+# the lane of the request being handled, used to pick the database pool
+current_lane: ContextVar[str] = ContextVar("current_lane", default=DEFAULT_LANE)
+
+lane_limiters: dict[str, CapacityLimiter] = {
+    lane: CapacityLimiter(lane_settings["THREADS"])
+    for lane, lane_settings in LANE_SETTINGS.items()
+}
+
+
+def configure_thread_pool() -> None:
+    """
+    Size AnyIO's shared thread pool so that every lane can use its full capacity
+    at the same time, the lane limiters are then the only contention point.
+    Must be called from within the running event loop.
+    """
+    total_threads = sum(
+        lane_settings["THREADS"] for lane_settings in LANE_SETTINGS.values()
+    )
+    anyio.to_thread.current_default_thread_limiter().total_tokens = (
+        total_threads + THREAD_POOL_HEADROOM
+    )
+
+
+def lane_route(lane: str) -> type[APIRoute]:
+    """
+    Build a route class that runs the routes of a router in the given lane and
+    records their timings (and their profile when requested) and checks their
+    statement budget, use it as the route_class of an APIRouter
+    *Args:
+        lane (str): name of the lane as configured in LANE_SETTINGS
+    *Returns:
+        an APIRoute subclass bound to the lane
+    """
+    limiter = lane_limiters[lane]
+
+    class LaneRoute(APIRoute):
+        def __init__(self, path: str, endpoint: Callable, **kwargs):
+            super().__init__(
+                path, timed_endpoint(profiled_endpoint(endpoint)), **kwargs
+            )
+
+        def get_route_handler(self) -> Callable:
+            route_handler = super().get_route_handler()
+            budget = getattr(self.endpoint, "statement_budget", None)
+
+            async def lane_route_handler(request: Request) -> Response:
+                token = current_lane.set(lane)
+                try:
+                    async with limiter:
+                        handler_started_at = time.perf_counter()
+                        try:
+                            return await route_handler(request)
+                        finally:
+                            record_handler_phases(handler_started_at)
+                finally:
+                    current_lane.reset(token)
+
+            if STATEMENT_BUDGET_SETTINGS["MODE"] == "off" or budget is False:
+                return lane_route_handler
+
+            async def budgeted_route_handler(request: Request) -> Response:
+                with count_statements() as counter:
+                    response = await lane_route_handler(request)
+                check_statement_budget(
+                    counter, route=f"{request.method} {self.path}", budget=budget
+                )
+                return response
+
+            return budgeted_route_handler
+
+    return LaneRoute
+
+
+async def stream_in_lane(iterator: Iterator[bytes], lane: str) -> AsyncIterator[bytes]:
+    """
+    Iterate a blocking iterator in worker threads while holding a slot of a lane,
+    use it for the body of a streamed response that reads from the database of
+    the lane: the response is sent after its route released its slot, so the
+    stream would hold a connection of the lane that the lane does not count
+    *Args:
+        iterator (Iterator[bytes]): the chunks of the response, closed at the end
+        lane (str): name of the lane as configured in LANE_SETTINGS
+    *Returns:
+        an async iterator over the chunks
+    """
+    async with lane_limiters[lane]:
+        try:
+            while True:
+                chunk = await anyio.to_thread.run_sync(next, iterator, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            # release the connection of the iterator even if the client is gone
+            with CancelScope(shield=True):
+                await anyio.to_thread.run_sync(iterator.close)
+
+
+def get_lanes_statistics() -> list[dict]:
+    """
+    Get the capacity, usage and queue depth of every lane
+    *Returns:
+        a list of dicts, one per lane
+    """
+    lanes_statistics = []
+    for lane, limiter in lane_limiters.items():
+        statistics = limiter.statistics()
+        lanes_statistics.append(
+            {
+                "lane": lane,
+                "capacity": int(statistics.total_tokens),
+                "in_use": statistics.borrowed_tokens,
+                "queue_depth": statistics.tasks_waiting,
+            }
+        )
+    return lanes_statistics
+
+
+# lane usage and queue depth, computed when the metrics are collected
+LANE_IN_USE = Gauge(
+    "lane_threads_in_use",
+    "Number of requests running in each execution lane",
+    labels=("lane",),
+    callback=lambda: [
+        ({"lane": statistics["lane"]}, statistics["in_use"])
+        for statistics in get_lanes_statistics()
+    ],
+)
+LANE_QUEUE_DEPTH = Gauge(
+    "lane_queue_depth",
+    "Number of requests waiting for a thread in each execution lane",
+    labels=("lane",),
+    callback=lambda: [
+        ({"lane": statistics["lane"]}, statistics["queue_depth"])
+        for statistics in get_lanes_statistics()
+    ],
+)
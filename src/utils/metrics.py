@@ -0,0 +1,278 @@
+import bisect
+import threading
+from typing import Callable, Optional
+
+# default histogram buckets in seconds, tuned for request and query latencies
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# every metric created is registered here and exposed by generate_metrics_text
+REGISTRY: list["_Metric"] = []
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    formatted = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'),
+        )
+        for name, value in labels.items()
+    )
+    return "{" + formatted + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """
+    Base class of the metrics, a metric keeps one series per combination of
+    label values and is thread-safe
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._series: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _label_values(self, labels: dict) -> tuple:
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def expose(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """
+    A monotonically increasing counter
+    """
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        label_values = self._label_values(labels)
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._series.get(self._label_values(labels), 0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            series = list(self._series.items())
+        return [
+            f"{self.name}{_format_labels(dict(zip(self.labels, label_values)))}"
+            f" {_format_value(value)}"
+            for label_values, value in series
+        ]
+
+
+class Gauge(_Metric):
+    """
+    A value that can go up and down, a gauge can also be computed at collection
+    time by a callback returning a list of (labels, value) tuples
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        callback: Optional[Callable[[], list[tuple[dict, float]]]] = None,
+    ):
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._series[self._label_values(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        label_values = self._label_values(labels)
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def _samples(self) -> list[str]:
+        if self.callback is not None:
+            series = [
+                (self._label_values(labels), value) for labels, value in self.callback()
+            ]
+        else:
+            with self._lock:
+                series = list(self._series.items())
+        return [
+            f"{self.name}{_format_labels(dict(zip(self.labels, label_values)))}"
+            f" {_format_value(value)}"
+            for label_values, value in series
+        ]
+
+
+class Histogram(_Metric):
+    """
+    A histogram with cumulative buckets
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels) -> None:
+        label_values = self._label_values(labels)
+        bucket_index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # [bucket counts..., +Inf count], [sum]
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[label_values] = series
+            series[0][bucket_index] += 1
+            series[1][0] += value
+
+    def collect(self) -> list[tuple[dict, list[int], float]]:
+        """
+        Get a snapshot of every series
+        *Returns:
+            a list of (labels, cumulative bucket counts, sum) tuples, the last
+            bucket count is the +Inf bucket (total count)
+        """
+        with self._lock:
+            snapshot = [
+                (label_values, list(counts), total[0])
+                for label_values, (counts, total) in self._series.items()
+            ]
+        collected = []
+        for label_values, counts, total in snapshot:
+            cumulative, running = [], 0
+            for count in counts:
+                running += count
+                cumulative.append(running)
+            collected.append((dict(zip(self.labels, label_values)), cumulative, total))
+        return collected
+
+    def _samples(self) -> list[str]:
+        samples = []
+        for labels, cumulative, total in self.collect():
+            for upper_bound, count in zip(self.buckets + (float("inf"),), cumulative):
+                bucket_labels = {**labels, "le": _format_value(upper_bound)}
+                samples.append(
+                    f"{self.name}_bucket{_format_labels(bucket_labels)} {count}"
+                )
+            samples.append(
+                f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+            )
+            samples.append(
+                f"{self.name}_count{_format_labels(labels)} {cumulative[-1]}"
+            )
+        return samples
+
+
+def generate_metrics_text() -> str:
+    """
+    Render every registered metric in the Prometheus text exposition format
+    """
+    return "\n".join(metric.expose() for metric in REGISTRY) + "\n"
+
+
+# per route latency of the requests, by method, route template and status
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Latency of the HTTP requests",
+    labels=("method", "route", "status"),
+)
+
+# number of SQL statements executed by each request, by route template
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "Number of SQL statements executed by a request",
+    labels=("route",),
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+# time spent waiting for a database connection from the pool of each lane
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting to check out a connection from the pool",
+    labels=("lane",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+
+# statement and lock timeouts of each lane
+DB_TIMEOUTS = Counter(
+    "db_timeouts_total",
+    "Number of statements canceled by statement_timeout or lock_timeout",
+    labels=("lane", "kind"),
+)
+
+# committed orders, rate(orders_placed_total[1m]) gives orders per minute. It is
+# not labeled by shop: the volume of each tenant must not leak to the scrapers
+# and a label per shop would grow without bound
+ORDERS_PLACED = Counter(
+    "orders_placed_total",
+    "Number of orders placed",
+)
+
+# time between placing an order and moving it to a new status
+ORDER_STATUS_TRANSITION = Histogram(
+    "order_status_transition_seconds",
+    "Time from placing an order to changing its status",
+    labels=("status",),
+    buckets=(10, 30, 60, 120, 300, 600, 1200, 1800, 3600),
+)
+
+# bcrypt hash and verify operations currently running or waiting for the GIL
+BCRYPT_IN_FLIGHT = Gauge(
+    "bcrypt_in_flight",
+    "Number of bcrypt operations in flight",
+)
+
+# rejected authentications, by reason
+AUTH_REJECTIONS = Counter(
+    "auth_rejections_total",
+    "Number of requests rejected by authentication or authorization",
+    labels=("reason",),
+)
+
+# cache lookups, by cache name and result (hit or miss)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Number of cache lookups",
+    labels=("cache", "result"),
+)
+
+# requests over their statement budget or repeating a statement, by route and kind
+STATEMENT_BUDGET_VIOLATIONS = Counter(
+    "statement_budget_violations_total",
+    "Number of statement budget violations (budget or repeated statement)",
+    labels=("route", "kind"),
+)
@@ -0,0 +1,36 @@
+import base64
+from typing import Any, Callable
+from fastapi import status
+from src.exceptions.exception import ShopsAppException
+
+
+def encode_cursor(key: tuple) -> str:
+    """
+    Build the opaque cursor of the page that comes after a row, from the key of
+    the row in the sort order of the pages (keyset pagination)
+    *Args:
+        key (tuple): the values of the sort columns of the last row of a page
+    *Returns:
+        the cursor
+    """
+    return base64.urlsafe_b64encode("|".join(map(str, key)).encode()).decode()
+
+
+def decode_cursor(cursor: str, types: tuple[Callable[[str], Any], ...]) -> tuple:
+    """
+    Get back the key a page starts after from its cursor
+    *Args:
+        cursor (str): the cursor returned with the previous page
+        types (tuple): the function parsing each value of the key, e.g. int
+    *Returns:
+        the key, raise exception if the cursor is not valid
+    """
+    try:
+        values = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        if len(values) != len(types):
+            raise ValueError("wrong number of values")
+        return tuple(parse(value) for parse, value in zip(types, values))
+    except ValueError:
+        raise ShopsAppException(
+            message="Invalid cursor", status_code=status.HTTP_400_BAD_REQUEST
+        )
@@ -0,0 +1,27 @@
+import re
+
+# characters ignored in a phone number, "+1 (555) 010-0000" is "+15550100000"
+PHONE_NO_SEPARATORS = re.compile(r"[\s\-().]")
+
+# a normalized phone number, digits with an optional leading +
+PHONE_NO_PATTERN = re.compile(r"\+?\d+")
+
+
+def normalize_phone_no(phone_no: str) -> str:
+    """
+    Get the canonical form of a phone number, the one stored for the customers,
+    so that the same number typed with or without separators is the same customer
+    *Args:
+        phone_no (str): the phone number as typed
+    *Returns:
+        the phone number without its separators
+    """
+    return PHONE_NO_SEPARATORS.sub("", phone_no)
+
+
+def is_valid_phone_no(phone_no: str) -> bool:
+    """
+    Check that a normalized phone number is made of digits with an optional
+    leading +
+    """
+    return PHONE_NO_PATTERN.fullmatch(phone_no) is not None
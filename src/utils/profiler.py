@@ -0,0 +1,159 @@
+import asyncio
+import cProfile
+import functools
+import io
+import pstats
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Optional
+from src.settings.settings import PROFILER_SETTINGS
+from src.utils.token_bucket import TokenBucket
+
+# number of functions listed in the call tree of a profile report
+REPORT_FUNCTIONS_LIMIT = 40
+
+
+class RequestProfile:
+    """
+    The profile of a single request, the SQL statements it executed with their
+    durations and the cProfile stats of its endpoint
+    """
+
+    def __init__(self, method: str, path: str, coffee_shop_id: int):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.coffee_shop_id = coffee_shop_id
+        self.created_at = datetime.now()
+        self.statements: list[tuple[str, float]] = []
+        self.profiler = cProfile.Profile()
+        # the call tree of an async endpoint is recorded on the event loop, it
+        # includes the other requests running on the loop at the same time
+        self.loop_wide = False
+        # an async endpoint is not profiled while another one is, the event loop
+        # has a single profiler
+        self.skipped = False
+        self.response_status: Optional[int] = None
+
+    def add_statement(self, statement: str, duration: float) -> None:
+        self.statements.append((statement, duration))
+
+    def report(self) -> str:
+        """
+        Render the profile as a plain text report
+        """
+        output = io.StringIO()
+        output.write(
+            f"Profile {self.id} of {self.method} {self.path} "
+            f"(coffee shop {self.coffee_shop_id}) at {self.created_at.isoformat()}\n"
+            f"Response status: {self.response_status}\n\n"
+        )
+        total_duration = sum(duration for _, duration in self.statements)
+        output.write(
+            f"SQL statements: {len(self.statements)}, "
+            f"total {total_duration * 1000:.2f} ms\n"
+        )
+        for statement, duration in self.statements:
+            output.write(f"{duration * 1000:10.2f} ms  {' '.join(statement.split())}\n")
+        if self.skipped:
+            output.write(
+                "\nCall tree: not recorded, another request was being profiled on"
+                " the event loop\n"
+            )
+            return output.getvalue()
+        if self.loop_wide:
+            output.write(
+                "\nCall tree of the event loop (sorted by cumulative time), it"
+                " includes the requests that ran concurrently:\n"
+            )
+        else:
+            output.write("\nCall tree (sorted by cumulative time):\n")
+        try:
+            stats = pstats.Stats(self.profiler, stream=output)
+        except TypeError:
+            # the endpoint did not run, e.g. the request failed validation
+            output.write("no calls recorded\n")
+        else:
+            stats.sort_stats("cumulative").print_stats(REPORT_FUNCTIONS_LIMIT)
+        return output.getvalue()
+
+
+# the profile of the request being handled, None when it is not profiled
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "current_profile", default=None
+)
+
+# profiling is expensive, so it is rate limited across the whole worker
+_profiles_bucket = TokenBucket(
+    rate=PROFILER_SETTINGS["RATE_PER_MINUTE"] / 60,
+    capacity=PROFILER_SETTINGS["BURST"],
+)
+
+# the profile of the async endpoint running under cProfile on the event loop
+_loop_profile: Optional[RequestProfile] = None
+
+
+def try_start_profile(
+    method: str, path: str, coffee_shop_id: int
+) -> Optional[RequestProfile]:
+    """
+    Create a profile for a request if the profiling rate allows it
+    *Returns:
+        the created profile, or None if the profiling rate is exceeded
+    """
+    if _profiles_bucket.try_acquire():
+        return None
+    return RequestProfile(method=method, path=path, coffee_shop_id=coffee_shop_id)
+
+
+def record_statement(statement: str, duration: float) -> None:
+    """
+    Record a SQL statement in the profile of the current request, if any
+    """
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add_statement(statement, duration)
+
+
+def profiled_endpoint(endpoint: Callable) -> Callable:
+    """
+    Wrap a route endpoint so that it runs under cProfile when the current request
+    is profiled. Sync endpoints are profiled in their worker thread only, async
+    endpoints are profiled on the event loop and their report is loop wide
+    """
+    # routes are re-created with the same endpoint when a router is included
+    if getattr(endpoint, "is_profiled_endpoint", False):
+        return endpoint
+
+    if asyncio.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def wrapped_endpoint(*args, **kwargs):
+            global _loop_profile
+            profile = current_profile.get()
+            if profile is None:
+                return await endpoint(*args, **kwargs)
+            if _loop_profile is not None:
+                profile.skipped = True
+                return await endpoint(*args, **kwargs)
+            _loop_profile = profile
+            profile.loop_wide = True
+            profile.profiler.enable()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profile.profiler.disable()
+                _loop_profile = None
+
+    else:
+
+        @functools.wraps(endpoint)
+        def wrapped_endpoint(*args, **kwargs):
+            profile = current_profile.get()
+            if profile is None:
+                return endpoint(*args, **kwargs)
+            return profile.profiler.runcall(endpoint, *args, **kwargs)
+
+    wrapped_endpoint.is_profiled_endpoint = True
+    return wrapped_endpoint
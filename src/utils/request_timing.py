@@ -0,0 +1,134 @@
+import asyncio
+import functools
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+# order in which the phases are reported in the Server-Timing header
+TIMING_PHASES = ("auth", "db", "deps", "app", "serialize")
+
+
+class RequestTimings:
+    """
+    Timings collected while handling a single request, durations are in seconds.
+    Phases may overlap, e.g. db time is spent inside the app phase.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.durations: dict[str, float] = defaultdict(float)
+        self.db_statements = 0
+        self.endpoint_started_at: Optional[float] = None
+        self.endpoint_finished_at: Optional[float] = None
+
+    def add(self, phase: str, duration: float) -> None:
+        self.durations[phase] += duration
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def server_timing_header(self) -> str:
+        """
+        Build the value of the Server-Timing header, durations in milliseconds
+        """
+        metrics = []
+        for phase in TIMING_PHASES:
+            if phase in self.durations:
+                metric = f"{phase};dur={self.durations[phase] * 1000:.2f}"
+                if phase == "db":
+                    metric += f';desc="{self.db_statements} statements"'
+                metrics.append(metric)
+        metrics.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+# the timings of the request being handled, None outside of a request
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "current_timings", default=None
+)
+
+
+def add_timing(phase: str, duration: float) -> None:
+    """
+    Add a duration to a phase of the current request, no-op outside of a request
+    """
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(phase, duration)
+
+
+@contextmanager
+def measure(phase: str):
+    """
+    Context manager that adds the time spent in its block to a phase of the
+    current request
+    """
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(phase, time.perf_counter() - started_at)
+
+
+@contextmanager
+def _measure_endpoint():
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    timings.endpoint_started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.endpoint_finished_at = time.perf_counter()
+        timings.add("app", timings.endpoint_finished_at - timings.endpoint_started_at)
+
+
+def timed_endpoint(endpoint: Callable) -> Callable:
+    """
+    Wrap a route endpoint so that the time spent in it is recorded as the app
+    phase, the wrapper keeps the signature and the sync/async nature of the
+    endpoint so FastAPI handles it the same way
+    """
+    # routes are re-created with the same endpoint when a router is included
+    if getattr(endpoint, "is_timed_endpoint", False):
+        return endpoint
+
+    if asyncio.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def wrapped_endpoint(*args, **kwargs):
+            with _measure_endpoint():
+                return await endpoint(*args, **kwargs)
+
+    else:
+
+        @functools.wraps(endpoint)
+        def wrapped_endpoint(*args, **kwargs):
+            with _measure_endpoint():
+                return endpoint(*args, **kwargs)
+
+    wrapped_endpoint.is_timed_endpoint = True
+    return wrapped_endpoint
+
+
+def record_handler_phases(handler_started_at: float) -> None:
+    """
+    Split the time spent in a route handler into the deps phase (dependencies
+    and body parsing before the endpoint) and the serialize phase (response
+    validation and serialization after the endpoint)
+    *Args:
+        handler_started_at (float): perf_counter value when the handler started
+    """
+    timings = current_timings.get()
+    if timings is None:
+        return
+    handler_finished_at = time.perf_counter()
+    if timings.endpoint_started_at is None:
+        timings.add("deps", handler_finished_at - handler_started_at)
+        return
+    timings.add("deps", timings.endpoint_started_at - handler_started_at)
+    if timings.endpoint_finished_at is not None:
+        timings.add("serialize", handler_finished_at - timings.endpoint_finished_at)
@@ -0,0 +1,131 @@
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+from src.settings.settings import STATEMENT_BUDGET_SETTINGS
+from src.utils.metrics import STATEMENT_BUDGET_VIOLATIONS
+
+logger = logging.getLogger(__name__)
+
+
+class StatementBudgetExceeded(Exception):
+    """
+    Raised in "raise" mode when a request exceeds its statement budget or
+    repeats the same statement too many times
+    """
+
+
+class StatementCounter:
+    """
+    Counts the SQL statements executed in a block, grouped by their SQL text
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.by_statement: Counter[str] = Counter()
+
+    def add(self, statement: str) -> None:
+        self.total += 1
+        self.by_statement[statement] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """
+        Get the statements executed at least threshold times, most repeated first
+        """
+        return [
+            (statement, count)
+            for statement, count in self.by_statement.most_common()
+            if count >= threshold
+        ]
+
+
+# the statement counter of the block being executed, None when not counting
+current_statement_counter: ContextVar[Optional[StatementCounter]] = ContextVar(
+    "current_statement_counter", default=None
+)
+
+
+@contextmanager
+def count_statements():
+    """
+    Context manager that counts the SQL statements executed in its block, e.g.
+        with count_statements() as counter:
+            find_users_page(db, coffee_shop_id, size=100)
+        assert counter.total <= 2
+    """
+    counter = StatementCounter()
+    token = current_statement_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        current_statement_counter.reset(token)
+
+
+def record_statement(statement: str) -> None:
+    """
+    Count a SQL statement in the current statement counter, if any
+    """
+    counter = current_statement_counter.get()
+    if counter is not None:
+        counter.add(statement)
+
+
+def statement_budget(max_statements: int) -> Callable:
+    """
+    Decorator overriding the default statement budget of a route endpoint, it
+    must be applied below the route decorator
+    *Args:
+        max_statements (int): the maximum number of statements of a request
+    """
+
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.statement_budget = max_statements
+        return endpoint
+
+    return decorator
+
+
+def no_statement_budget(endpoint: Callable) -> Callable:
+    """
+    Decorator opting a route endpoint out of the statement budget, for the bulk
+    endpoints that run the same statements once per chunk of rows. It must be
+    applied below the route decorator
+    """
+    endpoint.statement_budget = False
+    return endpoint
+
+
+def check_statement_budget(
+    counter: StatementCounter, route: str, budget: Optional[int] = None
+) -> None:
+    """
+    Check the statements of a request against its budget and flag the
+    statements repeated within the request (N+1 queries), violations are logged
+    or raised depending on the configured mode
+    *Args:
+        counter (StatementCounter): the statements executed by the request
+        route (str): the route of the request, used in the report
+        budget (int): the statement budget of the route, defaults to the
+        configured default budget
+    """
+    if budget is None:
+        budget = STATEMENT_BUDGET_SETTINGS["DEFAULT_BUDGET"]
+    violations = []
+    if counter.total > budget:
+        STATEMENT_BUDGET_VIOLATIONS.inc(route=route, kind="budget")
+        violations.append(f"{counter.total} statements executed, budget is {budget}")
+    for statement, count in counter.repeated(
+        STATEMENT_BUDGET_SETTINGS["REPEATED_STATEMENT_THRESHOLD"]
+    ):
+        STATEMENT_BUDGET_VIOLATIONS.inc(route=route, kind="repeated")
+        violations.append(
+            f"statement executed {count} times: {' '.join(statement.split())}"
+        )
+    if not violations:
+        return
+
+    message = f"{route}: " + "; ".join(violations)
+    if STATEMENT_BUDGET_SETTINGS["MODE"] == "raise":
+        raise StatementBudgetExceeded(message)
+    logger.warning("Statement budget violation in %s", message)
@@ -0,0 +1,36 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket rate limiter, tokens are refilled continuously at
+    `rate` tokens per second up to `capacity` tokens.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0:
+            raise ValueError(f"The rate of a token bucket must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """
+        Try to take one token from the bucket
+        *Returns:
+            0 if a token was taken, otherwise the number of seconds to wait
+            until a token becomes available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
@@ -0,0 +1,83 @@
+import logging
+import anyio.to_thread
+import httpx
+from fastapi import FastAPI
+from src.models.user import UserRole
+from src.security.jwt import create_access_token, verify_token
+from src.settings import database
+
+logger = logging.getLogger(__name__)
+
+# the shop of the warm-up token, no shop has this id so the requests are cheap
+WARM_UP_COFFEE_SHOP_ID = 0
+
+# representative requests run through the whole stack (routing, auth,
+# dependencies, SQL compilation, validation and serialization) before the
+# worker accepts traffic
+WARM_UP_PATHS = (
+    "/orders/",
+    "/menu-items/",
+    "/customers/",
+    "/inventory-items/",
+    "/users/",
+    f"/coffee-shops/{WARM_UP_COFFEE_SHOP_ID}/branches",
+)
+
+# result of each warm-up step
+warm_up_checks: dict[str, bool] = {}
+_warmed_up = False
+
+
+def is_warmed_up() -> bool:
+    """
+    Check if the warm-up has run, whether or not all of its steps succeeded
+    """
+    return _warmed_up
+
+
+async def _warm_up_requests(app: FastAPI) -> bool:
+    token = create_access_token(
+        {
+            "id": 0,
+            "sub": "warm-up",
+            "role": UserRole.ADMIN,
+            "branch_id": 0,
+            "coffee_shop_id": WARM_UP_COFFEE_SHOP_ID,
+        }
+    )
+    # the token is verified once here so the first real request does not pay
+    # for the first verification either
+    verify_token(token, Exception("invalid warm-up token"))
+
+    succeeded = True
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://warm-up",
+        headers={"Authorization": f"Bearer {token}"},
+    ) as client:
+        for path in WARM_UP_PATHS:
+            response = await client.get(path)
+            if response.status_code >= 500:
+                logger.warning(
+                    "Warm-up request GET %s failed with %s",
+                    path,
+                    response.status_code,
+                )
+                succeeded = False
+    return succeeded
+
+
+async def warm_up(app: FastAPI) -> None:
+    """
+    Warm up the worker before it accepts traffic: open the database pools and
+    run representative requests in process. A failed step is logged and
+    reported by the readiness probe, it does not prevent the worker from starting
+    *Args:
+        app (FastAPI): the application to warm up
+    """
+    global _warmed_up
+    warm_up_checks["database_pools"] = await anyio.to_thread.run_sync(
+        database.warm_up_pools
+    )
+    warm_up_checks["requests"] = await _warm_up_requests(app)
+    _warmed_up = True
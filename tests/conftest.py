@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import MetaData, create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.settings.database import Base
+from src.utils import statement_budget
+
+
+def _sqlite_metadata() -> MetaData:
+    # the change tracking columns are filled by a postgres trigger, give them a
+    # default in the sqlite copy of the tables
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        table = table.to_metadata(metadata)
+        for column_name in ("updated_at", "change_seq"):
+            if column_name in table.c:
+                table.c[column_name].server_default = None
+                table.c[column_name].nullable = True
+    return metadata
+
+
+@pytest.fixture
+def db():
+    """
+    A session of an in-memory sqlite database with all the tables, its
+    statements are counted by count_statements like the ones of the lane engines
+    """
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    _sqlite_metadata().create_all(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(conn, cursor, statement, parameters, context, many):
+        statement_budget.record_statement(statement)
+
+    session = sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
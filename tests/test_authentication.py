@@ -0,0 +1,31 @@
+import pytest
+from fastapi import status
+from src import schemas
+from src.exceptions.exception import ShopsAppException
+from src.helpers import authentication
+
+
+def test_login_with_unknown_email_verifies_the_dummy_hash(monkeypatch):
+    verified_hashes = []
+
+    def verify(plain_password: str, hashed_password: str) -> bool:
+        verified_hashes.append(hashed_password)
+        return False
+
+    monkeypatch.setattr(
+        authentication.user, "_find_user_with_coffee_shop_id", lambda db, email: None
+    )
+    monkeypatch.setattr(authentication.Hash, "verify", verify)
+
+    with pytest.raises(ShopsAppException) as error:
+        authentication.login(
+            request=schemas.LoginRequestBody(
+                username="unknown@example.com", password="secret"
+            ),
+            db=None,
+        )
+
+    # an unknown email costs one bcrypt verification, like a wrong password
+    assert verified_hashes == [authentication.DUMMY_PASSWORD_HASH]
+    assert error.value.status_code == status.HTTP_400_BAD_REQUEST
+    assert error.value.message == "Username or Password incorrect"
@@ -0,0 +1,17 @@
+import pytest
+from pydantic import ValidationError
+from src import schemas
+
+
+@pytest.mark.parametrize(
+    "schema", [schemas.CustomerPOSTRequestBody, schemas.CustomerPUTRequestBody]
+)
+def test_phone_numbers_are_stored_in_one_form(schema):
+    customer = schema(name="Walk-in", phone_no="+1 (555) 010-00.00")
+
+    assert customer.phone_no == "+15550100000"
+
+
+def test_phone_numbers_with_other_characters_are_rejected():
+    with pytest.raises(ValidationError):
+        schemas.CustomerPOSTRequestBody(name="Walk-in", phone_no="555-CALL-NOW")
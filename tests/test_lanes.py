@@ -0,0 +1,23 @@
+import anyio
+from src.utils.lanes import lane_limiters, stream_in_lane
+
+
+def test_stream_holds_a_slot_of_its_lane_until_closed():
+    closed = []
+
+    def chunks():
+        try:
+            yield b"a"
+            yield b"b"
+        finally:
+            closed.append(True)
+
+    async def consume():
+        in_use = []
+        async for chunk in stream_in_lane(chunks(), lane="reports"):
+            in_use.append(lane_limiters["reports"].borrowed_tokens)
+        return in_use
+
+    assert anyio.run(consume) == [1, 1]
+    assert lane_limiters["reports"].borrowed_tokens == 0
+    assert closed == [True]
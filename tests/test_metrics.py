@@ -0,0 +1,17 @@
+from sqlalchemy import text
+from src.helpers import order  # noqa: F401, registers the order counting hooks
+from src.utils.metrics import ORDERS_PLACED
+
+
+def test_orders_are_counted_once_committed(db):
+    placed_orders = ORDERS_PLACED.value()
+
+    db.execute(text("SELECT 1"))
+    db.info["placed_orders"] = 1
+    db.rollback()
+    assert ORDERS_PLACED.value() == placed_orders
+
+    db.execute(text("SELECT 1"))
+    db.info["placed_orders"] = 2
+    db.commit()
+    assert ORDERS_PLACED.value() == placed_orders + 2
@@ -0,0 +1,52 @@
+from src import models
+from src.helpers import menu_item, user
+from src.utils.statement_budget import count_statements
+
+
+def _add_shop(db, users: int = 0, menu_items: int = 0) -> None:
+    db.add(models.CoffeeShop(id=1, name="shop", location="here"))
+    db.add(models.Branch(id=1, name="branch", location="here", coffee_shop_id=1))
+    db.add_all(
+        models.User(
+            first_name="first",
+            last_name="last",
+            email=f"user{index}@example.com",
+            phone_no=f"0100{index}",
+            password="hash",
+            role=models.UserRole.CASHIER,
+            branch_id=1,
+        )
+        for index in range(users)
+    )
+    db.add_all(
+        models.MenuItem(name=f"item {index}", price=1, coffee_shop_id=1)
+        for index in range(menu_items)
+    )
+    db.commit()
+
+
+def test_users_page_is_a_single_statement(db):
+    _add_shop(db, users=30)
+
+    with count_statements() as counter:
+        page = user.find_users_page(db=db, coffee_shop_id=1, size=20)
+
+    assert len(page["users"]) == 20
+    assert page["next_cursor"] is not None
+    assert counter.total == 1
+
+
+def test_cached_menu_only_reads_its_version(db):
+    _add_shop(db, menu_items=10)
+    menu_item._menu_cache._entries.clear()
+
+    with count_statements() as counter:
+        menu = menu_item.find_menu(coffee_shop_id=1, db=db)
+    # the version and the menu
+    assert len(menu) == 10
+    assert counter.total == 2
+
+    with count_statements() as counter:
+        assert menu_item.find_menu(coffee_shop_id=1, db=db) is menu
+    assert counter.total == 1
+    assert counter.repeated(threshold=2) == []
@@ -0,0 +1,15 @@
+import pytest
+from src.utils.token_bucket import TokenBucket
+
+
+def test_bucket_waits_for_a_token_once_empty():
+    bucket = TokenBucket(rate=2, capacity=1)
+
+    assert bucket.try_acquire() == 0.0
+    assert 0 < bucket.try_acquire() <= 0.5
+
+
+@pytest.mark.parametrize("rate", [0, -1])
+def test_bucket_rejects_a_rate_that_is_not_positive(rate):
+    with pytest.raises(ValueError):
+        TokenBucket(rate=rate, capacity=1)